@@ -745,6 +745,7 @@ RIASSUNTI DEI GRUPPI:
         """Crea un report HTML completo multi-pagina con index.html"""
         from datetime import datetime
         from dashboard_manager import DashboardManager
+        from html_templates import format_report_timestamp
         import os
 
         if log_callback:
@@ -755,15 +756,18 @@ RIASSUNTI DEI GRUPPI:
         html_dir = report_base_dir / "analisi_principale"
         html_dir.mkdir(parents=True, exist_ok=True)
 
+        # Stesso timestamp nel footer di tutte le pagine del report
+        generated_at = format_report_timestamp()
+
         # 1. Genera index.html (pagina principale riassunto)
         self._create_index_page(html_dir, summary, chunks_analyzed, total_chunks,
-                               hierarchical, num_groups, analysis_config)
+                               hierarchical, num_groups, analysis_config, generated_at)
 
         # 2. Genera pagina configurazioni
-        self._create_config_page(html_dir, analysis_config)
+        self._create_config_page(html_dir, analysis_config, generated_at)
 
         # 3. Genera pagine analisi chunk
-        self._create_chunks_pages(html_dir, analyses, chunks_analyzed)
+        self._create_chunks_pages(html_dir, analyses, chunks_analyzed, generated_at)
 
         # 4. Genera CSS condiviso (nella cartella REPORT/)
         self._create_shared_css(report_base_dir)
@@ -795,7 +799,7 @@ RIASSUNTI DEI GRUPPI:
             f.write(get_shared_css())
 
     def _create_index_page(self, html_dir, summary, chunks_analyzed, total_chunks,
-                          hierarchical, num_groups, analysis_config):
+                          hierarchical, num_groups, analysis_config, generated_at=None):
         """Crea la pagina index.html con il riassunto finale"""
         from html_templates import create_html_page, format_text_to_html
         from datetime import datetime
@@ -887,14 +891,15 @@ RIASSUNTI DEI GRUPPI:
             active_page='index',
             subtitle='Riassunto Finale e Statistiche',
             breadcrumb_items=breadcrumb_items,
-            css_path='../styles.css'
+            css_path='../styles.css',
+            generated_at=generated_at
         )
 
         index_file = Path(html_dir) / "index.html"
         with open(index_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
 
-    def _create_config_page(self, html_dir, analysis_config):
+    def _create_config_page(self, html_dir, analysis_config, generated_at=None):
         """Crea la pagina configurazione.html"""
         from html_templates import create_html_page
         from datetime import datetime
@@ -1026,14 +1031,15 @@ RIASSUNTI DEI GRUPPI:
             active_page='config',
             subtitle='Dettagli della configurazione utilizzata',
             breadcrumb_items=breadcrumb_items,
-            css_path='../styles.css'
+            css_path='../styles.css',
+            generated_at=generated_at
         )
 
         config_file = Path(html_dir) / "configurazione.html"
         with open(config_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
 
-    def _create_chunks_pages(self, html_dir, analyses, chunks_analyzed):
+    def _create_chunks_pages(self, html_dir, analyses, chunks_analyzed, generated_at=None):
         """Crea la pagina indice chunks e le singole pagine di analisi"""
         from html_templates import create_html_page
         import html as html_lib
@@ -1084,7 +1090,8 @@ RIASSUNTI DEI GRUPPI:
             active_page='chunks',
             subtitle=f'{chunks_analyzed} chunk analizzati',
             breadcrumb_items=breadcrumb_items,
-            css_path='../styles.css'
+            css_path='../styles.css',
+            generated_at=generated_at
         )
 
         chunks_index = Path(html_dir) / "analisi_chunks.html"
@@ -1093,9 +1100,9 @@ RIASSUNTI DEI GRUPPI:
 
         # 2. Crea pagine individuali per ogni chunk
         for i, analysis in enumerate(analyses, 1):
-            self._create_single_chunk_page(html_dir, i, analysis, chunks_analyzed)
+            self._create_single_chunk_page(html_dir, i, analysis, chunks_analyzed, generated_at)
 
-    def _create_single_chunk_page(self, html_dir, chunk_num, analysis, total_chunks):
+    def _create_single_chunk_page(self, html_dir, chunk_num, analysis, total_chunks, generated_at=None):
         """Crea una singola pagina per un chunk"""
         from html_templates import create_html_page, format_text_to_html
         import html as html_lib
@@ -1144,7 +1151,8 @@ RIASSUNTI DEI GRUPPI:
             active_page='chunks',
             subtitle=f'Analisi dettagliata',
             breadcrumb_items=breadcrumb_items,
-            css_path='../styles.css'
+            css_path='../styles.css',
+            generated_at=generated_at
         )
 
         chunk_file = Path(html_dir) / f"chunk_{chunk_num:03d}.html"
@@ -1115,23 +1115,26 @@ class ChatReportDialog:
             self.update_status("Generazione HTML...", "blue")
             self.update_progress(90)
 
-            from html_templates import create_chat_index_page, create_chat_detail_page
+            from html_templates import create_chat_index_page, render_chat_pages, format_report_timestamp
+
+            # Stesso timestamp per tutte le pagine del report
+            generated_at = format_report_timestamp()
 
             # Index page
             index_path = create_chat_index_page(
                 chat_summaries=chat_summaries,
                 output_dir=chat_report_dir,
-                get_display_name_func=self.get_chat_display_name
+                get_display_name_func=self.get_chat_display_name,
+                generated_at=generated_at
             )
 
-            # Detail pages
-            for item in chat_summaries:
-                create_chat_detail_page(
-                    chat=item['chat'],
-                    summary=item['summary'],
-                    output_dir=chat_report_dir,
-                    get_display_name_func=self.get_chat_display_name
-                )
+            # Detail pages (generate in parallelo)
+            render_chat_pages(
+                chat_summaries=chat_summaries,
+                output_dir=chat_report_dir,
+                get_display_name_func=self.get_chat_display_name,
+                generated_at=generated_at
+            )
 
             self.log(f"✓ Report HTML salvati in: {chat_report_dir}")
 
@@ -0,0 +1,103 @@
+"""
+Checkpoint su disco dell'estrazione posizioni
+Salva i risultati LLM chunk per chunk per riprendere un'analisi interrotta
+
+© 2025 Luca Mercatanti - https://mercatanti.com
+"""
+
+import os
+import json
+
+# orjson opzionale: serializzazione più veloce delle righe JSONL
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps_line(obj):
+    """Serializza un oggetto come riga JSONL (bytes)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj) + b'\n'
+    return (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class ExtractionCheckpoint:
+    """File JSONL (una riga per chunk) con le posizioni estratte dall'LLM"""
+
+    def __init__(self, path, signature):
+        """
+        Apre il checkpoint, riprendendo i chunk già salvati se compatibili
+
+        Args:
+            path: Percorso del file JSONL
+            signature: Parametri dell'analisi (dict); se differiscono da quelli
+                       salvati il checkpoint riparte da zero
+        """
+        self.path = str(path)
+        self.signature = signature
+        self.completed = self._read()
+
+        if self.completed is None:
+            # Nessun checkpoint valido: nuovo file con la firma in prima riga
+            self.completed = {}
+            self._file = open(self.path, 'wb')
+            self._file.write(_dumps_line({'signature': signature}))
+            self._file.flush()
+        else:
+            self._file = open(self.path, 'ab')
+            if self._truncated:
+                self._file.write(b'\n')
+
+    def _read(self):
+        """
+        Legge i chunk già completati
+
+        Returns:
+            dict: chunk_id -> posizioni, o None se il file manca o non è compatibile
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Riga finale senza a capo: le nuove righe non devono accodarsi a essa
+        self._truncated = not data.endswith(b'\n')
+        lines = data.splitlines()
+
+        try:
+            if not lines or json.loads(lines[0]).get('signature') != self.signature:
+                return None
+        except (ValueError, AttributeError):
+            return None
+
+        completed = {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                completed[entry['chunk_id']] = entry['locations']
+            except (ValueError, KeyError, TypeError):
+                # Ultima riga troncata da un'interruzione: il chunk verrà rianalizzato
+                continue
+        return completed
+
+    def add(self, chunk_id, locations):
+        """Registra le posizioni di un chunk completato"""
+        self._file.write(_dumps_line({'chunk_id': chunk_id, 'locations': locations}))
+        self._file.flush()
+        self.completed[chunk_id] = locations
+
+    def close(self):
+        """Chiude il file (il checkpoint resta su disco)"""
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Chiude ed elimina il checkpoint (analisi completata)"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
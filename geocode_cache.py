@@ -0,0 +1,108 @@
+"""
+Cache su disco dei risultati di geocoding
+Evita di ripetere richieste a Nominatim/Google per posizioni già risolte
+
+© 2025 Luca Mercatanti - https://mercatanti.com
+"""
+
+import re
+import sqlite3
+import unicodedata
+import threading
+import time
+
+
+# Durata predefinita delle voci in cache: i report forensi sono statici
+DEFAULT_TTL = 30 * 86400  # secondi (30 giorni)
+
+# Posizioni non trovate: memorizzate più brevemente (i dati OSM/Google cambiano)
+NEGATIVE_TTL = 7 * 86400  # secondi (7 giorni)
+
+# Normalizzazione chiavi indirizzo: punteggiatura rimossa, spazi compattati
+_RE_PUNCTUATION = re.compile(r'[^\w\s]+')
+_RE_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_address(text):
+    """
+    Normalizza un indirizzo per usarlo come chiave di cache
+
+    Args:
+        text: Testo della posizione
+
+    Returns:
+        str: Testo NFKC minuscolo, senza punteggiatura e con spazi singoli
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = _RE_PUNCTUATION.sub(' ', text.lower())
+    return _RE_WHITESPACE.sub(' ', text).strip()
+
+
+def reverse_key(lat, lon):
+    """Chiave di cache per coordinate (griglia di circa 11 metri)"""
+    return f"{round(lat, 4)}:{round(lon, 4)}"
+
+
+class GeocodeCache:
+    """Cache SQLite (chiave -> lat, lon, display) condivisa tra analisi successive"""
+
+    def __init__(self, cache_path, ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL):
+        """
+        Apre (o crea) il database della cache
+
+        Args:
+            cache_path: Percorso del file SQLite
+            ttl: Validità delle voci in secondi
+            negative_ttl: Validità delle voci "non trovato" in secondi
+        """
+        self.cache_path = str(cache_path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, lat REAL, lon REAL, display TEXT, ts INTEGER)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Cerca una voce non scaduta
+
+        Args:
+            key: Chiave (indirizzo normalizzato o reverse_key)
+
+        Returns:
+            tuple: (lat, lon, display) o None se assente/scaduta;
+                   (None, None, None) per una posizione già cercata e non trovata
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, display, ts FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        ttl = self.ttl if row[0] is not None else self.negative_ttl
+        if time.time() - row[3] > ttl:
+            return None
+        return row[0], row[1], row[2]
+
+    def set(self, key, lat, lon, display=None):
+        """Memorizza (o aggiorna) il risultato per una chiave (lat/lon None = non trovato)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, lat, lon, display, ts) VALUES (?, ?, ?, ?, ?)",
+                (key, lat, lon, display, int(time.time()))
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Chiude la connessione al database"""
+        with self._lock:
+            self._conn.close()
@@ -5,12 +5,33 @@ Contiene tutte le funzioni per generare le pagine HTML
 © 2025 Luca Mercatanti - https://mercatanti.com
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import html
+import os
 import re
 
 
+# Filename: caratteri speciali da rimuovere e sequenze di spazi da sostituire con '_'
+_RE_FILENAME_SPECIAL = re.compile(r'[^\w\s-]+')
+_RE_FILENAME_SPACES = re.compile(r'\s+')
+
+# Caratteri che html.escape sostituisce (con quote=True)
+_RE_HTML_SPECIAL = re.compile(r'[&<>"\']')
+
+# Prefisso degli elementi di lista ordinata (1. item)
+_RE_ORDERED_ITEM = re.compile(r'\d+\.\s+')
+
+
+def _fast_escape(text):
+    """html.escape che evita le sostituzioni se il testo non contiene caratteri speciali"""
+    if _RE_HTML_SPECIAL.search(text) is None:
+        return text
+    return html.escape(text)
+
+
 def format_text_to_html(text):
     """
     Converte testo con formattazione Markdown/semplice in HTML semantico
@@ -33,9 +54,7 @@ def format_text_to_html(text):
     # Dividi in righe
     lines = text.split('\n')
     result = []
-    in_ul = False
-    in_ol = False
-    in_paragraph = False
+    open_list = None  # 'ul', 'ol' oppure None
     current_paragraph = []
 
     for line in lines:
@@ -43,93 +62,27 @@ def format_text_to_html(text):
 
         # Righe vuote chiudono paragrafi e liste
         if not stripped:
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-                in_paragraph = False
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
+            open_list = _flush_blocks(result, current_paragraph, open_list)
             continue
 
-        # Headers H1 (# Titolo)
-        if stripped.startswith('# ') and not stripped.startswith('##'):
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
-
-            title = stripped[2:].strip()
-            result.append(f'<h1>{title}</h1>')
-            continue
+        # Headers H1-H4 (# Titolo ... #### Titolo)
+        if stripped[0] == '#':
+            level = len(stripped) - len(stripped.lstrip('#'))
+            if level <= 4 and stripped[level:level + 1] == ' ':
+                open_list = _flush_blocks(result, current_paragraph, open_list)
 
-        # Headers H2 (## Titolo)
-        if stripped.startswith('## ') and not stripped.startswith('###'):
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
-
-            title = stripped[3:].strip()
-            result.append(f'<h2>{title}</h2>')
-            continue
-
-        # Headers H3 (### Titolo)
-        if stripped.startswith('### ') and not stripped.startswith('####'):
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
-
-            title = stripped[4:].strip()
-            result.append(f'<h3>{title}</h3>')
-            continue
-
-        # Headers H4 (#### Titolo)
-        if stripped.startswith('#### '):
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
-
-            title = stripped[5:].strip()
-            result.append(f'<h4>{title}</h4>')
-            continue
+                title = stripped[level + 1:].strip()
+                result.append(f'<h{level}>{title}</h{level}>')
+                continue
 
         # Liste non ordinate (- item o * item)
         if stripped.startswith('- ') or stripped.startswith('* '):
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
-            if not in_ul:
+            if open_list != 'ul':
+                _flush_blocks(result, current_paragraph, open_list)
                 result.append('<ul>')
-                in_ul = True
+                open_list = 'ul'
+            else:
+                _flush_blocks(result, current_paragraph, None)
 
             item = stripped[2:].strip()
             item = format_inline_styles(item)
@@ -137,44 +90,54 @@ def format_text_to_html(text):
             continue
 
         # Liste ordinate (1. item, 2. item, ecc.)
-        if re.match(r'^\d+\.\s+', stripped):
-            if current_paragraph:
-                result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if not in_ol:
+        # (il controllo sul primo carattere evita la regex per quasi tutte le righe)
+        if stripped[:1].isdigit() and (ordered_match := _RE_ORDERED_ITEM.match(stripped)):
+            if open_list != 'ol':
+                _flush_blocks(result, current_paragraph, open_list)
                 result.append('<ol>')
-                in_ol = True
+                open_list = 'ol'
+            else:
+                _flush_blocks(result, current_paragraph, None)
 
-            item = re.sub(r'^\d+\.\s+', '', stripped)
+            item = stripped[ordered_match.end():]
             item = format_inline_styles(item)
             result.append(f'<li>{item}</li>')
             continue
 
         # Testo normale - accumula in paragrafo
-        if in_ul or in_ol:
-            # Chiudi lista se il testo non è un item
-            if in_ul:
-                result.append('</ul>')
-                in_ul = False
-            if in_ol:
-                result.append('</ol>')
-                in_ol = False
+        # (chiudi la lista se il testo non è un item)
+        if open_list:
+            result.append(f'</{open_list}>')
+            open_list = None
 
         formatted_line = format_inline_styles(stripped)
         current_paragraph.append(formatted_line)
 
     # Chiudi eventuali elementi aperti
+    _flush_blocks(result, current_paragraph, open_list)
+
+    return '\n'.join(result)
+
+
+def _flush_blocks(result, current_paragraph, open_list):
+    """
+    Chiude il paragrafo in corso e la lista aperta (se presenti)
+
+    Returns:
+        None, da riassegnare allo stato della lista aperta
+    """
     if current_paragraph:
         result.append('<p>' + ' '.join(current_paragraph) + '</p>')
-    if in_ul:
-        result.append('</ul>')
-    if in_ol:
-        result.append('</ol>')
+        current_paragraph.clear()
+    if open_list:
+        result.append(f'</{open_list}>')
+    return None
 
-    return '\n'.join(result)
+
+@lru_cache(maxsize=256)
+def _format_summary_cached(summary):
+    """format_text_to_html con cache: le rigenerazioni ripetute dello stesso riassunto non lo riconvertono"""
+    return format_text_to_html(summary)
 
 
 def format_inline_styles(text):
@@ -746,11 +709,9 @@ def create_header(title, subtitle=''):
     """
 
 
-def create_footer():
-    """Crea il footer della pagina"""
-    return f"""
+_FOOTER_TPL = """
     <footer>
-        <p><strong>AI Forensics Report Analyzer</strong> - Report Generato il {datetime.now().strftime('%d/%m/%Y alle %H:%M:%S')}</p>
+        <p><strong>AI Forensics Report Analyzer</strong> - Report Generato il {generated_at}</p>
         <p>© 2025 <a href="https://mercatanti.com" target="_blank">Luca Mercatanti</a> - Tutti i diritti riservati</p>
     </footer>
 
@@ -761,7 +722,23 @@ def create_footer():
     """
 
 
-def create_html_page(title, content, active_page='index', subtitle='', breadcrumb_items=None, css_path='styles.css'):
+def format_report_timestamp():
+    """
+    Timestamp di generazione mostrato nel footer
+
+    Da calcolare una volta per batch di pagine e passare come generated_at,
+    così tutte le pagine dello stesso report riportano la stessa data.
+    """
+    return datetime.now().strftime('%d/%m/%Y alle %H:%M:%S')
+
+
+def create_footer(generated_at=None):
+    """Crea il footer della pagina"""
+    return _FOOTER_TPL.format(generated_at=generated_at or format_report_timestamp())
+
+
+def create_html_page(title, content, active_page='index', subtitle='', breadcrumb_items=None, css_path='styles.css',
+                     generated_at=None):
     """
     Crea una pagina HTML completa
 
@@ -773,6 +750,7 @@ def create_html_page(title, content, active_page='index', subtitle='', breadcrum
         breadcrumb_items: Lista di tuple (label, url) per il breadcrumb.
                          Es: [('🏠 Dashboard', '../index.html'), ('Analisi Principale', None)]
         css_path: Path al file CSS (default 'styles.css', per sottocartelle usare '../styles.css')
+        generated_at: Timestamp del footer (da format_report_timestamp); se None usa l'ora corrente
 
     Returns:
         str: HTML completo della pagina
@@ -796,7 +774,7 @@ def create_html_page(title, content, active_page='index', subtitle='', breadcrum
         <main>
             {content}
         </main>
-        {create_footer()}
+        {create_footer(generated_at)}
     </div>
 </body>
 </html>"""
@@ -804,123 +782,77 @@ def create_html_page(title, content, active_page='index', subtitle='', breadcrum
 
 # ===== FUNZIONI PER REPORT CHAT (v3.2) =====
 
-def create_chat_index_page(chat_summaries, output_dir, get_display_name_func):
-    """
-    Crea la pagina indice per il report chat (index_chat.html)
+# Buffer di scrittura ampio: le pagine vengono scritte sezione per sezione
+_PAGE_WRITE_BUFFER = 65536
 
-    Args:
-        chat_summaries: Lista di dict {'chat': chat_obj, 'summary': summary_text}
-        output_dir: Directory output (report_chat/)
-        get_display_name_func: Funzione per ottenere il nome visualizzato della chat
+_CHAT_PAGE_HEAD_TPL = """<!DOCTYPE html>
+<html lang="it">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - AI Forensics Report Analyzer</title>
+    <link rel="stylesheet" href="../styles.css">
+</head>
+<body>
+    <div class="container">
+        {header}
+        {breadcrumb}
+        <main>
+"""
 
-    Returns:
-        Path del file index_chat.html creato
-    """
-    # Separa 1v1 da gruppi
-    chats_1v1 = [item for item in chat_summaries if item['chat']['type'] == '1v1']
-    chats_group = [item for item in chat_summaries if item['chat']['type'] == 'group']
+_CHAT_PAGE_TAIL_TPL = """
+        </main>
+        {footer}
+    </div>
+</body>
+</html>"""
 
-    # Statistiche
-    stats_html = f"""
+_CHAT_STATS_TPL = """
     <div class="card success-box">
         <h2>📊 Statistiche</h2>
         <table>
             <tr>
                 <th>Chat 1v1</th>
-                <td><span class="badge badge-info">{len(chats_1v1)}</span></td>
+                <td><span class="badge badge-info">{n_1v1}</span></td>
             </tr>
             <tr>
                 <th>Gruppi</th>
-                <td><span class="badge badge-success">{len(chats_group)}</span></td>
+                <td><span class="badge badge-success">{n_group}</span></td>
             </tr>
             <tr>
                 <th>Totale conversazioni</th>
-                <td><span class="badge badge-primary">{len(chat_summaries)}</span></td>
+                <td><span class="badge badge-primary">{n_total}</span></td>
             </tr>
         </table>
     </div>
     """
 
-    # Sezione Chat 1v1
-    chats_1v1_html = ""
-    if chats_1v1:
-        chats_1v1_html = """
+_CHAT_SECTION_OPEN_TPL = """
         <div class="card">
-            <h2>💬 Chat Individuali (1v1)</h2>
+            <h2>{title}</h2>
             <div class="chunk-list">
         """
 
-        for item in chats_1v1:
-            chat = item['chat']
-            display_name = get_display_name_func(chat)
-            safe_filename = f"chat_{chat['chat_id']}_{sanitize_filename(display_name)}.html"
-
-            num_participants = len(chat.get('participants', []))
-            num_chunks = len(chat.get('chunks', []))
-            num_attachments = chat['metadata'].get('num_attachments', 0)
-            start_time = chat['metadata'].get('start_time', 'N/A')
-            last_activity = chat['metadata'].get('last_activity', 'N/A')
-
-            chats_1v1_html += f"""
-            <div class="chunk-item">
-                <a href="{safe_filename}">
-                    <strong>{html.escape(display_name)}</strong><br>
-                    <small style="color: #666;">
-                        👤 {num_participants} partecipanti<br>
-                        🧩 {num_chunks} chunk<br>
-                        📎 {num_attachments} allegati<br>
-                        📅 {format_date_range(start_time, last_activity)}
-                    </small>
-                </a>
-            </div>
-            """
-
-        chats_1v1_html += """
+_CHAT_SECTION_CLOSE_HTML = """
             </div>
         </div>
         """
 
-    # Sezione Gruppi
-    chats_group_html = ""
-    if chats_group:
-        chats_group_html = """
-        <div class="card">
-            <h2>👥 Gruppi</h2>
-            <div class="chunk-list">
-        """
-
-        for item in chats_group:
-            chat = item['chat']
-            display_name = get_display_name_func(chat)
-            safe_filename = f"chat_{chat['chat_id']}_{sanitize_filename(display_name)}.html"
-
-            num_participants = len(chat.get('participants', []))
-            num_chunks = len(chat.get('chunks', []))
-            num_attachments = chat['metadata'].get('num_attachments', 0)
-            start_time = chat['metadata'].get('start_time', 'N/A')
-            last_activity = chat['metadata'].get('last_activity', 'N/A')
-
-            chats_group_html += f"""
+_CHAT_ITEM_TPL = """
             <div class="chunk-item">
-                <a href="{safe_filename}">
-                    <strong>{html.escape(display_name)}</strong><br>
+                <a href="{href}">
+                    <strong>{name}</strong><br>
                     <small style="color: #666;">
-                        👥 {num_participants} partecipanti<br>
-                        🧩 {num_chunks} chunk<br>
-                        📎 {num_attachments} allegati<br>
-                        📅 {format_date_range(start_time, last_activity)}
+                        {icon} {n_participants} partecipanti<br>
+                        🧩 {n_chunks} chunk<br>
+                        📎 {n_attachments} allegati<br>
+                        📅 {date_range}
                     </small>
                 </a>
             </div>
             """
 
-        chats_group_html += """
-            </div>
-        </div>
-        """
-
-    # Link al report principale
-    back_link_html = """
+_CHAT_INDEX_NAV_HTML = """
     <div class="card info-box">
         <h3>🔗 Navigazione</h3>
         <p>
@@ -930,134 +862,191 @@ def create_chat_index_page(chat_summaries, output_dir, get_display_name_func):
     </div>
     """
 
-    content = stats_html + chats_1v1_html + chats_group_html + back_link_html
-
-    # Breadcrumb per index chat
-    from html_templates import create_breadcrumb
-    breadcrumb_items = [
-        ('🏠 Dashboard', '../index.html'),
-        ('Report Conversazioni', None)
-    ]
-    breadcrumb_html = create_breadcrumb(breadcrumb_items)
-
-    html_content = f"""<!DOCTYPE html>
-<html lang="it">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Report per Chat - AI Forensics Report Analyzer</title>
-    <link rel="stylesheet" href="../styles.css">
-</head>
-<body>
-    <div class="container">
-        {create_header('💬 Report per Chat', 'Riassunti individuali delle conversazioni')}
-        {breadcrumb_html}
-        <main>
-            {content}
-        </main>
-        {create_footer()}
+_CHAT_DETAIL_NAV_HTML = """
+    <div class="card info-box">
+        <p>
+            <a href="index.html" class="btn">← Torna all'Elenco Chat</a>
+            <a href="../index.html" class="btn">🏠 Dashboard</a>
+            <a href="../analisi_principale/index.html" class="btn">📱 Report Principale</a>
+        </p>
     </div>
-</body>
-</html>"""
-
-    index_file = Path(output_dir) / "index.html"
-    with open(index_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-
-    # Il CSS condiviso è già in REPORT/styles.css (creato dalla dashboard)
-
-    return str(index_file)
-
-
-def create_chat_detail_page(chat, summary, output_dir, get_display_name_func):
-    """
-    Crea la pagina dettaglio per una singola chat
-
-    Args:
-        chat: Dizionario con metadati chat
-        summary: Testo riassunto generato dall'AI
-        output_dir: Directory output (report_chat/)
-        get_display_name_func: Funzione per ottenere il nome visualizzato
-
-    Returns:
-        Path del file creato
     """
-    display_name = get_display_name_func(chat)
-    safe_filename = f"chat_{chat['chat_id']}_{sanitize_filename(display_name)}.html"
-
-    # Info chat
-    chat_type = "💬 Chat 1v1" if chat['type'] == '1v1' else "👥 Gruppo"
-    participants_list = '<br>'.join([
-        f"{'👑 ' if p.get('owner') else '👤 '}{html.escape(p.get('name', p.get('id', 'Sconosciuto')))}"
-        for p in chat.get('participants', [])
-    ])
 
-    info_html = f"""
+_CHAT_INFO_TPL = """
     <div class="card info-box">
         <h2>ℹ️ Informazioni Chat</h2>
         <table>
             <tr>
                 <th>Tipo</th>
-                <td><span class="badge {'badge-info' if chat['type'] == '1v1' else 'badge-success'}">{chat_type}</span></td>
+                <td><span class="badge {badge_class}">{chat_type}</span></td>
             </tr>
             <tr>
                 <th>Partecipanti</th>
-                <td>{participants_list}</td>
+                <td>{participants}</td>
             </tr>
             <tr>
                 <th>Periodo</th>
-                <td>{chat['metadata'].get('start_time', 'N/A')} → {chat['metadata'].get('last_activity', 'N/A')}</td>
+                <td>{start_time} → {last_activity}</td>
             </tr>
             <tr>
                 <th>Allegati</th>
-                <td>{chat['metadata'].get('num_attachments', 0)}</td>
+                <td>{n_attachments}</td>
             </tr>
             <tr>
                 <th>Chunk analizzati</th>
-                <td>{len(chat.get('chunks', []))}</td>
+                <td>{n_chunks}</td>
             </tr>
         </table>
     </div>
     """
 
-    # Riassunto AI (converti markdown → HTML)
-    summary_html = format_text_to_html(summary)
-
-    summary_content = f"""
+_CHAT_SUMMARY_OPEN_HTML = """
     <div class="card">
         <h2>📝 Riassunto Conversazione</h2>
         <div class="content">
-            {summary_html}
+            """
+
+_CHAT_SUMMARY_CLOSE_HTML = """
         </div>
     </div>
     """
 
-    # Link ai chunk originali
-    chunks_links = []
-    for chunk_num in chat.get('chunks', []):
-        chunks_links.append(f'<a href="../analisi_principale/chunk_{chunk_num:03d}.html" class="btn">Chunk {chunk_num}</a>')
-
-    chunks_html = f"""
+_CHAT_CHUNKS_TPL = """
     <div class="card">
         <h3>🔗 Analisi Dettagliate Chunk</h3>
         <p>
-            {' '.join(chunks_links)}
+            {links}
         </p>
     </div>
     """
 
-    # Link navigazione
-    nav_html = """
-    <div class="card info-box">
-        <p>
-            <a href="index.html" class="btn">← Torna all'Elenco Chat</a>
-            <a href="../index.html" class="btn">🏠 Dashboard</a>
-            <a href="../analisi_principale/index.html" class="btn">📱 Report Principale</a>
-        </p>
-    </div>
+
+def create_chat_index_page(chat_summaries, output_dir, get_display_name_func, generated_at=None):
+    """
+    Crea la pagina indice per il report chat (index_chat.html)
+
+    Args:
+        chat_summaries: Lista di dict {'chat': chat_obj, 'summary': summary_text}
+        output_dir: Directory output (report_chat/)
+        get_display_name_func: Funzione per ottenere il nome visualizzato della chat
+        generated_at: Timestamp del footer (da format_report_timestamp)
+
+    Returns:
+        Path del file index_chat.html creato
     """
+    index_file = Path(output_dir) / "index.html"
+    with open(index_file, 'w', encoding='utf-8', buffering=_PAGE_WRITE_BUFFER) as f:
+        _write_chat_index(f, chat_summaries, get_display_name_func, generated_at)
+
+    # Il CSS condiviso è già in REPORT/styles.css (creato dalla dashboard)
+
+    return os.fspath(index_file)
+
+
+def _write_chat_index(f, chat_summaries, get_display_name_func, generated_at):
+    """Scrive la pagina indice chat direttamente sul file, sezione per sezione"""
+    # Separa 1v1 da gruppi
+    chats_1v1 = [item for item in chat_summaries if item['chat']['type'] == '1v1']
+    chats_group = [item for item in chat_summaries if item['chat']['type'] == 'group']
+
+    # Breadcrumb per index chat
+    breadcrumb_items = [
+        ('🏠 Dashboard', '../index.html'),
+        ('Report Conversazioni', None)
+    ]
+
+    f.write(_CHAT_PAGE_HEAD_TPL.format(
+        title='Report per Chat',
+        header=create_header('💬 Report per Chat', 'Riassunti individuali delle conversazioni'),
+        breadcrumb=create_breadcrumb(breadcrumb_items)
+    ))
+
+    # Statistiche
+    f.write(_CHAT_STATS_TPL.format(
+        n_1v1=len(chats_1v1),
+        n_group=len(chats_group),
+        n_total=len(chat_summaries)
+    ))
+
+    # Sezione Chat 1v1
+    if chats_1v1:
+        _write_chat_section(f, '💬 Chat Individuali (1v1)', '👤', chats_1v1, get_display_name_func)
+
+    # Sezione Gruppi
+    if chats_group:
+        _write_chat_section(f, '👥 Gruppi', '👥', chats_group, get_display_name_func)
+
+    # Link al report principale
+    f.write(_CHAT_INDEX_NAV_HTML)
+
+    f.write(_CHAT_PAGE_TAIL_TPL.format(footer=create_footer(generated_at)))
+
+
+def _write_chat_section(f, title, participants_icon, items, get_display_name_func):
+    """Scrive una sezione (1v1 o gruppi) della pagina indice chat"""
+    f.write(_CHAT_SECTION_OPEN_TPL.format(title=title))
+
+    for item in items:
+        chat = item['chat']
+        display_name = get_display_name_func(chat)
+        safe_filename = f"chat_{chat['chat_id']}_{sanitize_filename(display_name)}.html"
+
+        metadata = chat['metadata']
+
+        f.write(_CHAT_ITEM_TPL.format(
+            href=safe_filename,
+            name=_fast_escape(display_name),
+            icon=participants_icon,
+            n_participants=len(chat.get('participants', [])),
+            n_chunks=len(chat.get('chunks', [])),
+            n_attachments=metadata.get('num_attachments', 0),
+            date_range=format_date_range(metadata.get('start_time', 'N/A'), metadata.get('last_activity', 'N/A'))
+        ))
+
+    f.write(_CHAT_SECTION_CLOSE_HTML)
 
-    content = nav_html + info_html + summary_content + chunks_html + nav_html
+
+def create_chat_detail_page(chat, summary, output_dir, get_display_name_func, generated_at=None):
+    """
+    Crea la pagina dettaglio per una singola chat
+
+    Args:
+        chat: Dizionario con metadati chat
+        summary: Testo riassunto generato dall'AI
+        output_dir: Directory output (report_chat/), str o Path
+                    (passare un Path evita la conversione ad ogni chiamata)
+        get_display_name_func: Funzione per ottenere il nome visualizzato
+        generated_at: Timestamp del footer (da format_report_timestamp)
+
+    Returns:
+        Path del file creato
+    """
+    display_name = get_display_name_func(chat)
+    safe_filename = f"chat_{chat['chat_id']}_{sanitize_filename(display_name)}.html"
+
+    if not isinstance(output_dir, Path):
+        output_dir = Path(output_dir)
+    detail_file = output_dir / safe_filename
+    with open(detail_file, 'w', encoding='utf-8', buffering=_PAGE_WRITE_BUFFER) as f:
+        _write_chat_detail(f, chat, summary, display_name, generated_at)
+
+    return os.fspath(detail_file)
+
+
+def _write_chat_detail(f, chat, summary, display_name, generated_at):
+    """Scrive la pagina dettaglio di una chat direttamente sul file, sezione per sezione"""
+    escaped_name = _fast_escape(display_name)
+
+    # Info chat
+    chat_type = "💬 Chat 1v1" if chat['type'] == '1v1' else "👥 Gruppo"
+    parts = []
+    append = parts.append
+    for p in chat.get('participants', ()):
+        name = p.get('name') or p.get('id') or 'Sconosciuto'
+        append('👑 ' if p.get('owner') else '👤 ')
+        append(_fast_escape(str(name)))
+        append('<br>')
+    participants_list = ''.join(parts[:-1])
 
     # Breadcrumb per dettaglio chat
     breadcrumb_items = [
@@ -1065,51 +1054,101 @@ def create_chat_detail_page(chat, summary, output_dir, get_display_name_func):
         ('Report Conversazioni', 'index.html'),
         (display_name, None)
     ]
-    breadcrumb_html = create_breadcrumb(breadcrumb_items)
 
-    html_content = f"""<!DOCTYPE html>
-<html lang="it">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Chat: {html.escape(display_name)} - AI Forensics Report Analyzer</title>
-    <link rel="stylesheet" href="../styles.css">
-</head>
-<body>
-    <div class="container">
-        {create_header(f'{chat_type}: {html.escape(display_name)}', 'Riassunto conversazione')}
-        {breadcrumb_html}
-        <main>
-            {content}
-        </main>
-        {create_footer()}
-    </div>
-</body>
-</html>"""
+    f.write(_CHAT_PAGE_HEAD_TPL.format(
+        title=f'Chat: {escaped_name}',
+        header=create_header(f'{chat_type}: {escaped_name}', 'Riassunto conversazione'),
+        breadcrumb=create_breadcrumb(breadcrumb_items)
+    ))
+
+    # Link navigazione (ripetuti in testa e in coda alla pagina)
+    f.write(_CHAT_DETAIL_NAV_HTML)
+
+    metadata = chat['metadata']
+    f.write(_CHAT_INFO_TPL.format(
+        badge_class='badge-info' if chat['type'] == '1v1' else 'badge-success',
+        chat_type=chat_type,
+        participants=participants_list,
+        start_time=metadata.get('start_time', 'N/A'),
+        last_activity=metadata.get('last_activity', 'N/A'),
+        n_attachments=metadata.get('num_attachments', 0),
+        n_chunks=len(chat.get('chunks', []))
+    ))
+
+    # Riassunto AI (converti markdown → HTML)
+    f.write(_CHAT_SUMMARY_OPEN_HTML)
+    f.write(_format_summary_cached(summary))
+    f.write(_CHAT_SUMMARY_CLOSE_HTML)
+
+    # Link ai chunk originali
+    chunks_links = []
+    for chunk_num in chat.get('chunks', []):
+        chunks_links.append(f'<a href="../analisi_principale/chunk_{chunk_num:03d}.html" class="btn">Chunk {chunk_num}</a>')
+
+    f.write(_CHAT_CHUNKS_TPL.format(links=' '.join(chunks_links)))
+
+    f.write(_CHAT_DETAIL_NAV_HTML)
+
+    f.write(_CHAT_PAGE_TAIL_TPL.format(footer=create_footer(generated_at)))
+
+
+def render_chat_pages(chat_summaries, output_dir, get_display_name_func, max_workers=None, generated_at=None):
+    """
+    Crea in parallelo le pagine dettaglio di tutte le chat
+
+    Ogni pagina è indipendente (file proprio, riassunto proprio), quindi il
+    rendering viene distribuito su un pool di thread. I nomi visualizzati sono
+    calcolati prima di avviare il pool, così get_display_name_func viene
+    invocata solo dal thread chiamante.
+
+    Args:
+        chat_summaries: Lista di dict {'chat': chat_obj, 'summary': summary_text}
+        output_dir: Directory output (report_chat/)
+        get_display_name_func: Funzione per ottenere il nome visualizzato della chat
+        max_workers: Numero massimo di thread (default: scelto da ThreadPoolExecutor)
+        generated_at: Timestamp del footer, condiviso da tutte le pagine (default: ora corrente)
+
+    Returns:
+        Lista dei path dei file creati, nello stesso ordine di chat_summaries
+    """
+    jobs = [
+        (item['chat'], item['summary'], get_display_name_func(item['chat']))
+        for item in chat_summaries
+    ]
+    if not jobs:
+        return []
+
+    # Converti la directory e formatta il timestamp una sola volta per tutte le pagine
+    out_dir = Path(output_dir)
+    generated_at = generated_at or format_report_timestamp()
 
-    detail_file = Path(output_dir) / safe_filename
-    with open(detail_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    def render_one(job):
+        chat, summary, display_name = job
+        return create_chat_detail_page(chat, summary, out_dir, lambda _chat: display_name, generated_at)
 
-    return str(detail_file)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(render_one, jobs))
 
 
 def sanitize_filename(name):
     """Rende un nome sicuro per un filename"""
-    # Rimuovi caratteri speciali e spazi
-    safe_name = re.sub(r'[^\w\s-]', '', name)
-    safe_name = re.sub(r'[\s]+', '_', safe_name)
+    # Rimuovi caratteri speciali e spazi (pattern precompilati, sostituzioni costanti)
+    safe_name = _RE_FILENAME_SPECIAL.sub('', name)
+    safe_name = _RE_FILENAME_SPACES.sub('_', safe_name)
     safe_name = safe_name.strip('_').lower()
 
     # Limita lunghezza
-    if len(safe_name) > 50:
-        safe_name = safe_name[:50]
-
-    return safe_name or 'unnamed'
+    return safe_name[:50] or 'unnamed'
 
 
+@lru_cache(maxsize=1024)
 def format_date_range(start, end):
-    """Formatta un range di date in modo compatto"""
+    """
+    Formatta un range di date in modo compatto
+
+    Il risultato è memorizzato (cache limitata) per coppia start/end: le stesse
+    date si ripetono tra pagine e rigenerazioni dello stesso report.
+    """
     if start == 'N/A' or not start:
         return 'N/A'
 
@@ -8,10 +8,48 @@ Mostra all'avvio se la licenza non è presente o non valida
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from tkinter import font as tkfont
 import webbrowser
 import threading
 import queue
-from license_manager import LicenseManager
+import json
+import re
+import time
+import urllib.parse
+from collections import OrderedDict
+from license_manager import LicenseManager, TELEMETRY_TIMEOUT
+
+
+# Intervallo di controllo della coda risultati: parte basso (risposte rapide
+# consegnate subito) e raddoppia fino al massimo
+_RESULT_POLL_MIN_MS = 15
+_RESULT_POLL_MAX_MS = 100
+
+# Link mailto per la richiesta manuale di licenza (oggetto e corpo già codificati)
+_MAILTO_URL = 'mailto:luca.mercatanti@gmail.com?' + urllib.parse.urlencode(
+    {
+        'subject': "Richiesta Licenza - AI Forensics Report Analyzer",
+        'body': (
+            "Nome e Cognome: [INSERISCI QUI]\n\n"
+            "Motivo utilizzo: [OPZIONALE]\n\n"
+            "Grazie!"
+        )
+    },
+    quote_via=urllib.parse.quote
+)
+
+# Validazione email semplice: testo@dominio.estensione, senza spazi
+_EMAIL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+\Z')
+
+# Formato abituale della chiave (XXXX-XXXX-XXXX-XXXX): solo suggerimento durante la digitazione
+_LICENSE_KEY_RE = re.compile(r'[A-Z0-9]{4}(?:-[A-Z0-9]{4}){3}\Z', re.IGNORECASE)
+
+# Attesa dopo l'ultimo tasto prima di controllare il formato della chiave
+_PREVALIDATE_DELAY_MS = 400
+
+# Cache in memoria delle validazioni riuscite (per chiave di licenza)
+_VALIDATION_CACHE_TTL = 60  # secondi
+_VALIDATION_CACHE_SIZE = 8
 
 
 class LicenseDialog:
@@ -25,14 +63,41 @@ class LicenseDialog:
         """
         self.parent = parent
         self.license_manager = license_manager
+
+        # Campi fissi dei payload API e corpo (già serializzato) della telemetria di uscita
+        self._base_payload = license_manager.base_payload
+        self._track_body = json.dumps({'action': 'track_no_license', **self._base_payload}).encode('utf-8')
         self.license_valid = False
         self.is_validating = False
-        self.result_queue = queue.Queue()
+        self._debounce_id = None
+        self._request_dialog = None
+        self._result_step_id = None
+        self._poll_id = None
+
+        # Gestori degli errori di generazione licenza, per error_code restituito dall'API
+        self._generation_error_handlers = {
+            'PC_ALREADY_USED': self._handle_pc_already_used,
+            'INVALID_EMAIL': self._handle_invalid_email,
+        }
+        self.result_queue = queue.SimpleQueue()
+
+        # Unico worker persistente per tutto l'I/O di rete del dialog
+        # (warm-up, validazioni, telemetria di uscita), creato al primo utilizzo
+        self._io_jobs = queue.SimpleQueue()
+        self._io_worker = None
+
+        # Sessione HTTP del LicenseManager (stesse connessioni keep-alive della validazione)
+        self.http = license_manager.session
+
+        # Apri subito la connessione verso l'API mentre l'utente compila il dialog
+        self._submit_io(self._warmup_connection)
+
+        # license_key -> (timestamp monotonic, risultato), ordine LRU
+        self._validation_cache = OrderedDict()
 
         # Crea dialog modale
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Licenza - AI Forensics Report Analyzer")
-        self.dialog.geometry("650x700")
         self.dialog.resizable(False, False)
 
         # Rendi il dialog modale
@@ -41,7 +106,7 @@ class LicenseDialog:
 
         self.setup_ui()
 
-        # Centra il dialog DOPO aver creato l'UI
+        # Dimensioni e posizione in un'unica chiamata geometry()
         self.center_dialog()
 
         # Impedisci chiusura dialog con X (deve validare la licenza)
@@ -49,10 +114,8 @@ class LicenseDialog:
 
     def center_dialog(self):
         """Centra il dialog sullo schermo"""
-        # Forza aggiornamento geometria
-        self.dialog.update_idletasks()
-
-        # Usa dimensioni fisse (650x700) per maggiore leggibilità
+        # Usa dimensioni fisse (650x700) per maggiore leggibilità: non serve
+        # leggere la geometria dei widget, quindi niente update_idletasks()
         width = 650
         height = 700
 
@@ -65,8 +128,31 @@ class LicenseDialog:
         # Imposta geometria
         self.dialog.geometry(f'{width}x{height}+{x}+{y}')
 
+    def _setup_fonts(self):
+        """Crea una sola volta i font e gli stili usati dai widget del dialog"""
+        self._f_h1 = tkfont.Font(family='Arial', size=16, weight='bold')
+        self._f_h2 = tkfont.Font(family='Arial', size=14, weight='bold')
+        self._f_email = tkfont.Font(family='Arial', size=13, weight='bold')
+        self._f_body = tkfont.Font(family='Arial', size=10)
+        self._f_body_bold = tkfont.Font(family='Arial', size=10, weight='bold')
+        self._f_small = tkfont.Font(family='Arial', size=9)
+        self._f_mono = tkfont.Font(family='Courier', size=9)
+        self._f_mono_entry = tkfont.Font(family='Courier', size=11)
+
+        # Stili ttk con nome: le label li referenziano invece di passare font/colori
+        style = ttk.Style(self.dialog)
+        style.configure('Title.TLabel', font=self._f_h1)
+        style.configure('Heading.TLabel', font=self._f_h2)
+        style.configure('Body.TLabel', font=self._f_body)
+        style.configure('Subtitle.TLabel', font=self._f_body, foreground='gray')
+        style.configure('Bold.TLabel', font=self._f_body_bold)
+        style.configure('Field.TLabel', font=self._f_small)
+        style.configure('Small.TLabel', font=self._f_small, foreground='gray')
+        style.configure('HW.TLabel', font=self._f_mono, foreground='#555')
+
     def setup_ui(self):
         """Configura l'interfaccia grafica"""
+        self._setup_fonts()
 
         # Frame principale
         main_frame = ttk.Frame(self.dialog, padding="20")
@@ -79,33 +165,29 @@ class LicenseDialog:
         ttk.Label(
             header_frame,
             text="🔐 Licenza Richiesta",
-            font=('Arial', 16, 'bold')
+            style='Title.TLabel'
         ).pack(anchor=tk.W)
 
         ttk.Label(
             header_frame,
             text="Inserisci la tua chiave di licenza per utilizzare AI Forensics Report Analyzer",
-            font=('Arial', 10),
-            foreground='gray'
+            style='Subtitle.TLabel'
         ).pack(anchor=tk.W, pady=(5, 0))
 
         # ===== HARDWARE ID INFO =====
         info_frame = ttk.LabelFrame(main_frame, text="ℹ️ Informazioni Sistema", padding="12")
         info_frame.pack(fill=tk.X, pady=(0, 15))
 
-        hardware_id = self.license_manager.get_hardware_id()
         ttk.Label(
             info_frame,
-            text=f"Hardware ID: {hardware_id[:32]}...",
-            font=('Courier', 9),
-            foreground='#555'
+            text=self.license_manager.get_hardware_id_display(),
+            style='HW.TLabel'
         ).pack(anchor=tk.W)
 
         ttk.Label(
             info_frame,
             text="La licenza verrà associata automaticamente a questo PC",
-            font=('Arial', 9),
-            foreground='gray'
+            style='Small.TLabel'
         ).pack(anchor=tk.W, pady=(5, 0))
 
         # ===== INPUT LICENZA =====
@@ -115,17 +197,20 @@ class LicenseDialog:
         ttk.Label(
             input_frame,
             text="Inserisci la chiave di licenza ricevuta via email:",
-            font=('Arial', 10)
+            style='Body.TLabel'
         ).pack(anchor=tk.W, pady=(0, 10))
 
         # Entry per la licenza
-        self.license_entry = ttk.Entry(input_frame, font=('Courier', 11), width=50)
+        self.license_entry = ttk.Entry(input_frame, font=self._f_mono_entry, width=50)
         self.license_entry.pack(fill=tk.X, pady=(0, 10))
         self.license_entry.focus()
 
         # Bind Enter per validare
         self.license_entry.bind('<Return>', lambda e: self.validate_license())
 
+        # Controllo formato chiave durante la digitazione (con debounce)
+        self.license_entry.bind('<KeyRelease>', self._on_license_typed)
+
         # Frame bottoni validazione
         buttons_frame = ttk.Frame(input_frame)
         buttons_frame.pack(fill=tk.X)
@@ -139,14 +224,14 @@ class LicenseDialog:
         self.validate_button.pack(side=tk.LEFT)
 
         # Spinner per validazione in corso
-        self.spinner_label = ttk.Label(buttons_frame, text="", font=('Arial', 10))
+        self.spinner_label = ttk.Label(buttons_frame, text="", style='Body.TLabel')
         self.spinner_label.pack(side=tk.LEFT, padx=(10, 0))
 
         # ===== STATUS MESSAGE =====
         self.status_label = ttk.Label(
             main_frame,
             text="",
-            font=('Arial', 10),
+            style='Body.TLabel',
             foreground='red'
         )
         self.status_label.pack(fill=tk.X, pady=(0, 15))
@@ -158,7 +243,7 @@ class LicenseDialog:
         ttk.Label(
             request_frame,
             text="Genera la tua licenza gratuita istantaneamente:",
-            font=('Arial', 10, 'bold')
+            style='Bold.TLabel'
         ).pack(anchor=tk.W, pady=(0, 10))
 
         # Form generazione licenza
@@ -166,17 +251,17 @@ class LicenseDialog:
         form_frame.pack(fill=tk.X, pady=(0, 12))
 
         # Nome
-        ttk.Label(form_frame, text="Nome:", font=('Arial', 9)).grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Label(form_frame, text="Nome:", style='Field.TLabel').grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
         self.nome_entry = ttk.Entry(form_frame, width=25)
         self.nome_entry.grid(row=0, column=1, sticky=tk.W, padx=(5, 0), pady=(0, 5))
 
         # Cognome
-        ttk.Label(form_frame, text="Cognome:", font=('Arial', 9)).grid(row=1, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Label(form_frame, text="Cognome:", style='Field.TLabel').grid(row=1, column=0, sticky=tk.W, pady=(0, 5))
         self.cognome_entry = ttk.Entry(form_frame, width=25)
         self.cognome_entry.grid(row=1, column=1, sticky=tk.W, padx=(5, 0), pady=(0, 5))
 
         # Email
-        ttk.Label(form_frame, text="Email:", font=('Arial', 9)).grid(row=2, column=0, sticky=tk.W)
+        ttk.Label(form_frame, text="Email:", style='Field.TLabel').grid(row=2, column=0, sticky=tk.W)
         self.email_entry = ttk.Entry(form_frame, width=25)
         self.email_entry.grid(row=2, column=1, sticky=tk.W, padx=(5, 0))
 
@@ -195,8 +280,7 @@ class LicenseDialog:
         ttk.Label(
             request_frame,
             text="Oppure richiedi via email:",
-            font=('Arial', 9),
-            foreground='gray'
+            style='Small.TLabel'
         ).pack(anchor=tk.W, pady=(0, 8))
 
         ttk.Button(
@@ -213,8 +297,7 @@ class LicenseDialog:
         ttk.Label(
             footer_frame,
             text="© 2025 Luca Mercatanti - https://mercatanti.com",
-            font=('Arial', 9),
-            foreground='gray'
+            style='Small.TLabel'
         ).pack(side=tk.LEFT)
 
         ttk.Button(
@@ -223,6 +306,14 @@ class LicenseDialog:
             command=self.exit_application
         ).pack(side=tk.RIGHT)
 
+    def _warmup_connection(self):
+        """Stabilisce in background la connessione (DNS + TLS) verso l'API licenze"""
+        try:
+            self.http.head(self.license_manager.api_url, timeout=(3, 5))
+        except Exception:
+            # Solo un'ottimizzazione: gli errori emergeranno alla richiesta vera
+            pass
+
     def generate_license_auto(self):
         """Genera automaticamente una licenza gratuita"""
         nome = self.nome_entry.get().strip()
@@ -258,7 +349,7 @@ class LicenseDialog:
             return
 
         # Validazione email semplice
-        if '@' not in email or '.' not in email.split('@')[-1]:
+        if not _EMAIL_RE.match(email):
             messagebox.showwarning(
                 "Email Non Valida",
                 "Inserisci un'email valida (es. nome@esempio.com)",
@@ -270,24 +361,21 @@ class LicenseDialog:
         # Genera licenza tramite API
         self.status_label.config(text="⚡ Generazione licenza in corso...", foreground='blue')
 
-        try:
-            import requests
-            import platform
+        import requests
 
+        try:
             payload = {
                 'action': 'generate_license',
                 'nome': nome,
                 'cognome': cognome,
                 'email': email,
-                'hardware_id': self.license_manager.get_hardware_id(),
-                'hostname': platform.node(),
-                'os': f"{platform.system()} {platform.release()}"
+                **self._base_payload
             }
 
-            response = requests.post(
+            response = self.http.post(
                 self.license_manager.api_url,
-                json=payload,
-                timeout=10
+                data=json.dumps(payload).encode('utf-8'),
+                timeout=(3, 10)
             )
 
             result = response.json()
@@ -316,50 +404,12 @@ class LicenseDialog:
                 self.validate_button.focus()
 
             else:
-                # Errore generazione
-                error_msg = result.get('message', 'Errore sconosciuto')
-
-                # Caso speciale: PC ha già generato una licenza
-                if 'già generato una licenza' in error_msg:
-                    existing_license = result.get('existing_license', '')
-                    existing_email = result.get('existing_email', '')
-
-                    self.status_label.config(text="⚠️ PC già utilizzato per generazione", foreground='orange')
-
-                    # Mostra dialog con licenza esistente
-                    response = messagebox.askyesno(
-                        "Licenza Già Generata",
-                        f"Questo PC ha già generato una licenza!\n\n"
-                        f"Email associata: {existing_email}\n"
-                        f"Chiave: {existing_license[:20]}...\n\n"
-                        f"Vuoi usare la licenza esistente?",
-                        parent=self.dialog
-                    )
-
-                    if response:
-                        # Utente vuole usare la licenza esistente
-                        self.license_entry.delete(0, tk.END)
-                        self.license_entry.insert(0, existing_license)
-                        self.status_label.config(text="✓ Licenza esistente caricata", foreground='green')
-                        self.validate_button.focus()
-                    else:
-                        # Utente rifiuta, mostra opzione email
-                        messagebox.showinfo(
-                            "Richiesta Manuale",
-                            "Se hai perso la tua licenza o vuoi generarne una nuova,\n"
-                            "contatta l'amministratore via email usando il bottone\n"
-                            "'📨 Contatta via Email' qui sotto.",
-                            parent=self.dialog
-                        )
-                else:
-                    # Altri errori
-                    self.status_label.config(text=f"✗ {error_msg}", foreground='red')
-
-                    messagebox.showerror(
-                        "Errore Generazione",
-                        f"Impossibile generare la licenza.\n\n{error_msg}",
-                        parent=self.dialog
-                    )
+                # Errore generazione: gestore scelto in base al codice errore del server
+                handler = self._generation_error_handlers.get(
+                    self._generation_error_code(result),
+                    self._handle_generation_error
+                )
+                handler(result)
 
         except requests.exceptions.Timeout:
             self.status_label.config(text="✗ Timeout connessione", foreground='red')
@@ -377,6 +427,62 @@ class LicenseDialog:
                 parent=self.dialog
             )
 
+    def _generation_error_code(self, result):
+        """Codice errore della generazione licenza (con fallback per server senza error_code)"""
+        error_code = result.get('error_code')
+        if error_code is None and 'già generato una licenza' in result.get('message', ''):
+            error_code = 'PC_ALREADY_USED'
+        return error_code
+
+    def _handle_pc_already_used(self, result):
+        """Il PC ha già generato una licenza: propone di riutilizzarla"""
+        existing_license = result.get('existing_license', '')
+        existing_email = result.get('existing_email', '')
+
+        self.status_label.config(text="⚠️ PC già utilizzato per generazione", foreground='orange')
+
+        # Mostra dialog con licenza esistente
+        response = messagebox.askyesno(
+            "Licenza Già Generata",
+            f"Questo PC ha già generato una licenza!\n\n"
+            f"Email associata: {existing_email}\n"
+            f"Chiave: {existing_license[:20]}...\n\n"
+            f"Vuoi usare la licenza esistente?",
+            parent=self.dialog
+        )
+
+        if response:
+            # Utente vuole usare la licenza esistente
+            self.license_entry.delete(0, tk.END)
+            self.license_entry.insert(0, existing_license)
+            self.status_label.config(text="✓ Licenza esistente caricata", foreground='green')
+            self.validate_button.focus()
+        else:
+            # Utente rifiuta, mostra opzione email
+            messagebox.showinfo(
+                "Richiesta Manuale",
+                "Se hai perso la tua licenza o vuoi generarne una nuova,\n"
+                "contatta l'amministratore via email usando il bottone\n"
+                "'📨 Contatta via Email' qui sotto.",
+                parent=self.dialog
+            )
+
+    def _handle_invalid_email(self, result):
+        """Email rifiutata dal server: errore e focus sul campo email"""
+        self._handle_generation_error(result)
+        self.email_entry.focus()
+
+    def _handle_generation_error(self, result):
+        """Errore generico di generazione licenza"""
+        error_msg = result.get('message', 'Errore sconosciuto')
+        self.status_label.config(text=f"✗ {error_msg}", foreground='red')
+
+        messagebox.showerror(
+            "Errore Generazione",
+            f"Impossibile generare la licenza.\n\n{error_msg}",
+            parent=self.dialog
+        )
+
     def validate_license(self):
         """Valida la licenza inserita"""
         if self.is_validating:
@@ -392,24 +498,84 @@ class LicenseDialog:
             )
             return
 
-        # Avvia validazione in thread separato
+        # Avvia validazione nel worker dedicato (il formato della chiave è solo un
+        # suggerimento durante la digitazione: esistono chiavi libere e di prova,
+        # la validità la decide il server)
         self.is_validating = True
-        self.validate_button.config(state='disabled')
-        self.license_entry.config(state='disabled')
+        self.validate_button.state(['disabled'])
+        self.license_entry.state(['disabled'])
         self.status_label.config(text="⏳ Validazione in corso...", foreground='blue')
 
-        thread = threading.Thread(target=self._validate_thread, args=(license_key,))
-        thread.daemon = True
-        thread.start()
+        self._submit_io(self._validate_thread, license_key)
+
+        # Avvia controllo della coda risultati
+        self._check_result_queue(_RESULT_POLL_MIN_MS)
+
+    def _on_license_typed(self, event=None):
+        """Riprogramma il controllo formato chiave dopo ogni tasto (debounce)"""
+        if self._debounce_id is not None:
+            self.dialog.after_cancel(self._debounce_id)
+        self._debounce_id = self.dialog.after(_PREVALIDATE_DELAY_MS, self._prevalidate_license)
+
+    def _prevalidate_license(self):
+        """Controllo sintattico della chiave, senza chiamate all'API"""
+        self._debounce_id = None
+        if self.is_validating:
+            return
+
+        license_key = self.license_entry.get().strip()
+        if not license_key:
+            self.status_label.config(text="")
+        elif _LICENSE_KEY_RE.match(license_key):
+            self.status_label.config(text="✓ Formato chiave corretto", foreground='green')
+        else:
+            self._show_key_format_error()
+
+    def _show_key_format_error(self):
+        """Segnala una chiave con formato non valido"""
+        self.status_label.config(
+            text="✗ Formato chiave non valido (atteso XXXX-XXXX-XXXX-XXXX)",
+            foreground='red'
+        )
 
-        # Avvia controllo periodico della coda risultati
-        self._check_result_queue()
+    def _submit_io(self, func, *args):
+        """Accoda un lavoro di rete al worker, avviandolo se non ancora attivo"""
+        if self._io_worker is None:
+            self._io_worker = threading.Thread(
+                target=self._io_worker_loop,
+                name='license-io'
+            )
+            self._io_worker.daemon = True
+            self._io_worker.start()
+
+        self._io_jobs.put((func, args))
+
+    def _stop_io_worker(self):
+        """Termina il worker di rete (se avviato) dopo i lavori già accodati"""
+        if self._io_worker is not None:
+            self._io_jobs.put(None)
+            self._io_worker = None
+
+    def _io_worker_loop(self):
+        """Esegue i lavori accodati finché non riceve None"""
+        while True:
+            job = self._io_jobs.get()
+            if job is None:
+                return
+            func, args = job
+            func(*args)
 
     def _validate_thread(self, license_key):
-        """Thread per validazione online (non blocca UI)"""
+        """Validazione online eseguita nel worker (non blocca UI)"""
         try:
-            # Valida online
-            result = self.license_manager.validate_license_online(license_key)
+            # Validazione recente della stessa chiave: evita il round-trip di rete
+            result = self._get_cached_validation(license_key)
+
+            if result is None:
+                # Valida online
+                result = self.license_manager.validate_license_online(license_key)
+                if result.get('valid'):
+                    self._store_cached_validation(license_key, result)
 
             # Metti il risultato nella coda (thread-safe)
             self.result_queue.put(('success', license_key, result))
@@ -418,8 +584,37 @@ class LicenseDialog:
             # Metti l'errore nella coda
             self.result_queue.put(('error', str(e), None))
 
-    def _check_result_queue(self):
-        """Controlla periodicamente la coda per risultati dal thread"""
+    def _get_cached_validation(self, license_key):
+        """Restituisce il risultato di una validazione riuscita da meno di 60s, o None"""
+        cached = self._validation_cache.get(license_key)
+        if cached is None:
+            return None
+
+        timestamp, result = cached
+        if time.monotonic() - timestamp >= _VALIDATION_CACHE_TTL:
+            del self._validation_cache[license_key]
+            return None
+
+        self._validation_cache.move_to_end(license_key)
+        return result
+
+    def _store_cached_validation(self, license_key, result):
+        """Memorizza una validazione riuscita, scartando la meno recente oltre il limite"""
+        self._validation_cache[license_key] = (time.monotonic(), result)
+        self._validation_cache.move_to_end(license_key)
+        while len(self._validation_cache) > _VALIDATION_CACHE_SIZE:
+            self._validation_cache.popitem(last=False)
+
+    def _check_result_queue(self, interval=_RESULT_POLL_MIN_MS):
+        """
+        Controlla la coda per risultati dal thread
+
+        Il thread di validazione non può notificare Tk direttamente: il dialog
+        viene mostrato con wait_window() prima di root.mainloop(), e in quella
+        fase tkinter rifiuta chiamate da altri thread. Il controllo resta quindi
+        nel thread UI, con intervallo crescente (15ms → 100ms).
+        """
+        self._poll_id = None
         try:
             # Prova a prendere un risultato dalla coda (non-blocking)
             result_type, data1, data2 = self.result_queue.get_nowait()
@@ -432,44 +627,88 @@ class LicenseDialog:
                 self._handle_validation_error(error_msg)
 
         except queue.Empty:
-            # Nessun risultato ancora, ricontrolla tra 100ms
+            # Nessun risultato ancora, ricontrolla con intervallo raddoppiato
             if self.is_validating:
-                self.dialog.after(100, self._check_result_queue)
+                next_interval = min(interval * 2, _RESULT_POLL_MAX_MS)
+                self._poll_id = self.dialog.after(interval, self._check_result_queue, next_interval)
+
+    def _cancel_result_poll(self):
+        """Annulla il controllo coda in attesa (nessun risveglio dopo la chiusura)"""
+        if self._poll_id is not None:
+            self.dialog.after_cancel(self._poll_id)
+            self._poll_id = None
 
     def _handle_validation_result(self, license_key, result):
-        """Gestisce il risultato della validazione"""
+        """
+        Gestisce il risultato della validazione
+
+        Il lavoro è diviso in passi brevi eseguiti in callback idle successive
+        (stato → salvataggio → messaggio → chiusura), così Tk può ridisegnare
+        tra un passo e l'altro. La catena si interrompe se il dialog viene chiuso.
+        """
+        # Tutte le modifiche ai widget in un'unica callback idle (un solo relayout)
+        self._schedule_result_step(self._step_show_status, license_key, result)
+
+    def _schedule_result_step(self, step, *args):
+        """Programma il prossimo passo della gestione risultato"""
+        self._result_step_id = self.dialog.after_idle(step, *args)
+
+    def _cancel_result_steps(self):
+        """Annulla il passo in attesa (es. chiusura del dialog a metà sequenza)"""
+        if self._result_step_id is not None:
+            self.dialog.after_cancel(self._result_step_id)
+            self._result_step_id = None
+
+    def _step_show_status(self, license_key, result):
+        """Passo 1: aggiorna stato dei widget e messaggio in base al risultato"""
         self.is_validating = False
-        self.validate_button.config(state='normal')
-        self.license_entry.config(state='normal')
+        self.validate_button.state(['!disabled'])
+        self.license_entry.state(['!disabled'])
 
         if result.get('valid'):
-            # Licenza valida!
-            self.status_label.config(text="✓ Licenza valida!", foreground='green')
+            status_text, status_color = "✓ Licenza valida!", 'green'
+            next_step = self._step_persist
+        else:
+            status_text = "✗ {}".format(result.get('message', 'Licenza non valida'))
+            status_color = 'red'
+            next_step = self._step_notify_user
+        self.status_label.config(text=status_text, foreground=status_color)
+
+        # Messagebox e salvataggio solo dopo che il layout è stato ridisegnato
+        self._schedule_result_step(next_step, license_key, result)
+
+    def _step_persist(self, license_key, result):
+        """Passo 2 (licenza valida): salva la licenza e la validazione in locale"""
+        # Salva la licenza con il record firmato della validazione: al prossimo avvio
+        # non serve ripeterla online
+        if not self.license_manager.remember_validation(license_key, result):
+            self._result_step_id = None
+            messagebox.showerror(
+                "Errore Salvataggio",
+                "Impossibile salvare la licenza localmente.",
+                parent=self.dialog
+            )
+            return
 
-            # Salva localmente
-            if self.license_manager.save_license(license_key):
-                messagebox.showinfo(
-                    "Licenza Attivata",
-                    "La tua licenza è stata attivata con successo!\n\n"
-                    "L'applicazione si avvierà ora.",
-                    parent=self.dialog
-                )
+        self.license_valid = True
 
-                self.license_valid = True
+        self._schedule_result_step(self._step_notify_user, license_key, result)
 
-                # Chiudi dialog
-                self.dialog.grab_release()
-                self.dialog.destroy()
-            else:
-                messagebox.showerror(
-                    "Errore Salvataggio",
-                    "Impossibile salvare la licenza localmente.",
-                    parent=self.dialog
-                )
+    def _step_notify_user(self, license_key, result):
+        """Passo 3: informa l'utente dell'esito"""
+        self._result_step_id = None
+
+        if result.get('valid'):
+            messagebox.showinfo(
+                "Licenza Attivata",
+                "La tua licenza è stata attivata con successo!\n\n"
+                "L'applicazione si avvierà ora.",
+                parent=self.dialog
+            )
+            self._schedule_result_step(self._step_close)
         else:
             # Licenza non valida
             message = result.get('message', 'Licenza non valida')
-            self.status_label.config(text=f"✗ {message}", foreground='red')
 
             messagebox.showerror(
                 "Licenza Non Valida",
@@ -480,16 +719,33 @@ class LicenseDialog:
                 parent=self.dialog
             )
 
+    def _step_close(self):
+        """Passo 4 (licenza attivata): rilascia le risorse e chiude il dialog"""
+        self._result_step_id = None
+        self._stop_io_worker()
+
+        # Chiudi dialog
+        self.dialog.grab_release()
+        self.dialog.destroy()
+
     def _handle_validation_error(self, error_message):
         """Gestisce errori durante la validazione"""
         self.is_validating = False
-        self.validate_button.config(state='normal')
-        self.license_entry.config(state='normal')
+        self.validate_button.state(['!disabled'])
+        self.license_entry.state(['!disabled'])
         self.status_label.config(text=f"✗ Errore: {error_message}", foreground='red')
 
     def show_request_license_info(self):
         """Mostra dialog con istruzioni per richiedere licenza"""
+        # Dialog già costruito: mostralo di nuovo invece di ricrearlo
+        if self._request_dialog is not None and self._request_dialog.winfo_exists():
+            self._request_dialog.deiconify()
+            self._request_dialog.lift()
+            self._request_dialog.grab_set()
+            return
+
         request_dialog = tk.Toplevel(self.dialog)
+        self._request_dialog = request_dialog
         request_dialog.title("Richiedi Licenza Gratuita")
         request_dialog.geometry("600x450")
         request_dialog.resizable(False, False)
@@ -506,7 +762,7 @@ class LicenseDialog:
         ttk.Label(
             frame,
             text="📧 Richiedi Licenza Gratuita",
-            font=('Arial', 14, 'bold')
+            style='Heading.TLabel'
         ).pack(anchor=tk.W, pady=(0, 15))
 
         # Istruzioni
@@ -524,7 +780,7 @@ class LicenseDialog:
             height=7,
             relief=tk.FLAT,
             bg='#f0f0f0',
-            font=('Arial', 10),
+            font=self._f_body,
             padx=10,
             pady=10
         )
@@ -539,14 +795,14 @@ class LicenseDialog:
         ttk.Label(
             email_section,
             text="Invia la tua richiesta a:",
-            font=('Arial', 10, 'bold')
+            style='Bold.TLabel'
         ).pack(anchor=tk.W, pady=(0, 8))
 
         # Email label
         email_label = tk.Label(
             email_section,
             text="luca.mercatanti@gmail.com",
-            font=('Arial', 13, 'bold'),
+            font=self._f_email,
             foreground='#0066cc',
             bg='#f0f0f0',
             padx=15,
@@ -559,14 +815,7 @@ class LicenseDialog:
 
         # Bottone per aprire client email
         def open_email(event=None):
-            subject = "Richiesta Licenza - AI Forensics Report Analyzer"
-            body = (
-                "Nome e Cognome: [INSERISCI QUI]\n\n"
-                "Motivo utilizzo: [OPZIONALE]\n\n"
-                "Grazie!"
-            )
-            mailto_url = f"mailto:luca.mercatanti@gmail.com?subject={subject}&body={body}"
-            webbrowser.open(mailto_url)
+            webbrowser.open(_MAILTO_URL)
 
         # Rendi l'email cliccabile
         email_label.bind('<Button-1>', open_email)
@@ -578,11 +827,19 @@ class LicenseDialog:
             style='Accent.TButton'
         ).pack(fill=tk.X)
 
+        # Chiudi = nascondi (il dialog viene riutilizzato alla prossima apertura)
+        def hide_dialog():
+            request_dialog.grab_release()
+            request_dialog.withdraw()
+            self.dialog.grab_set()
+
+        request_dialog.protocol("WM_DELETE_WINDOW", hide_dialog)
+
         # Bottone chiudi
         ttk.Button(
             frame,
             text="Chiudi",
-            command=request_dialog.destroy
+            command=hide_dialog
         ).pack(side=tk.BOTTOM)
 
     def on_close_attempt(self):
@@ -599,35 +856,34 @@ class LicenseDialog:
 
     def exit_application(self):
         """Chiude l'applicazione"""
-        # Traccia l'uscita senza licenza
+        # Traccia l'uscita senza licenza (in background, chiude anche la sessione HTTP)
         self._track_no_license_exit()
+        self._stop_io_worker()
+        self._cancel_result_poll()
+        self._cancel_result_steps()
 
         self.dialog.grab_release()
         self.dialog.destroy()
         self.parent.quit()
 
     def _track_no_license_exit(self):
-        """Invia telemetria quando utente esce senza inserire licenza"""
-        try:
-            import requests
-            import platform
+        """Invia telemetria quando utente esce senza inserire licenza (non blocca la chiusura)"""
+        self._submit_io(self._send_no_license_exit)
 
-            payload = {
-                'action': 'track_no_license',
-                'hardware_id': self.license_manager.get_hardware_id(),
-                'hostname': platform.node(),
-                'os': f"{platform.system()} {platform.release()}"
-            }
-
-            # Timeout breve per non rallentare la chiusura
-            requests.post(
+    def _send_no_license_exit(self):
+        """Invio della telemetria di uscita senza licenza (eseguito nel worker di rete)"""
+        try:
+            # Timeout brevi (connessione, lettura): il worker è daemon e la risposta è ignorata
+            self.http.post(
                 self.license_manager.api_url,
-                json=payload,
-                timeout=2
+                data=self._track_body,
+                timeout=TELEMETRY_TIMEOUT
             )
         except Exception:
-            # Ignora errori - non vogliamo bloccare la chiusura
+            # Ignora errori - la telemetria non è critica
             pass
+        finally:
+            self.license_manager.close()
 
     def is_valid(self):
         """Restituisce se la licenza è stata validata"""
@@ -7,17 +7,214 @@ Gestisce validazione, salvataggio e telemetria delle licenze
 """
 
 import os
+import socket
 import platform
+import functools
 import uuid
 import hashlib
 import json
-import requests
+import time
+import threading
+from collections import namedtuple
 from pathlib import Path
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Identificatori della macchina usati per hardware ID, chiave locale e payload API
+MachineInfo = namedtuple('MachineInfo', 'hostname username mac system machine release')
+
+# Durata di una validazione online riuscita, salvata insieme alla licenza
+VALIDATION_CACHE_TTL = 86400  # secondi (24 ore)
+
+# Chiave pubblica Ed25519 (base64) del server licenze: verifica la firma del record
+# di validazione (license_key|hardware_id|valid_until) prima di fidarsi della cache.
+# Vuota = cache disabilitata, validazione online a ogni avvio
+LICENSE_PUBLIC_KEY = ''
+
+# Tolleranza (secondi) sulla differenza tra l'orologio locale e quello del server
+_CLOCK_SKEW = 300
+
+# Timeout (connessione, lettura) in secondi: una connessione lenta non consuma
+# il tempo riservato alla risposta e viceversa
+VALIDATE_TIMEOUT = (3, 7)
+TELEMETRY_TIMEOUT = (0.5, 1.0)
+
+# Opzioni socket delle connessioni verso l'API: niente attesa di Nagle sui POST
+# piccoli e keep-alive TCP sulle connessioni riutilizzate dal pool
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+def _create_http_session():
+    """Sessione HTTP con keep-alive e pool di connessioni verso l'API licenze"""
+    # Import differiti: requests/urllib3 servono solo alla prima chiamata di rete
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(total=1, backoff_factor=0.2)
+    )
+    # Ricrea il pool con le opzioni socket (HTTPAdapter non le accetta nel costruttore)
+    adapter.init_poolmanager(2, 4, socket_options=_SOCKET_OPTIONS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Content-Type': 'application/json', 'Connection': 'keep-alive'})
+    return session
+
+
+# Risultati di validazione per gli errori di rete più comuni (costruiti una sola volta,
+# da non modificare)
+_ERR_TIMEOUT = {
+    'valid': False,
+    'message': 'Timeout: impossibile contattare il server di validazione',
+    'license_info': None
+}
+_ERR_CONNECTION = {
+    'valid': False,
+    'message': 'Errore connessione: verifica la tua connessione internet',
+    'license_info': None
+}
+
+
+def _validation_error_result(error):
+    """Risultato di validazione fallita per un errore generico"""
+    return {
+        'valid': False,
+        'message': f'Errore validazione: {str(error)}',
+        'license_info': None
+    }
+
+
+def _request_error_result(error):
+    """Risultato di validazione fallita per un'eccezione di requests"""
+    from requests.exceptions import Timeout, ConnectionError as RequestsConnectionError
+
+    # Timeout prima di ConnectionError: ConnectTimeout deriva da entrambe
+    if isinstance(error, Timeout):
+        return _ERR_TIMEOUT
+    if isinstance(error, RequestsConnectionError):
+        return _ERR_CONNECTION
+    return _validation_error_result(error)
+
+
+def _json_dumps(obj):
+    """Serializza in JSON (bytes UTF-8), con orjson se disponibile"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _json_loads(data):
+    """Deserializza JSON da bytes, con orjson se disponibile"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@functools.lru_cache(maxsize=1)
+def _collect_machine_info():
+    """Raccoglie una sola volta per processo gli identificatori della macchina"""
+    # Una sola chiamata a uname() per nome host, sistema, architettura e release
+    uname = platform.uname()
+    return MachineInfo(
+        hostname=uname.node,
+        username=os.getenv('USERNAME') or os.getenv('USER') or 'unknown',
+        mac=hex(uuid.getnode()),
+        system=uname.system,
+        machine=uname.machine,
+        release=uname.release
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _compute_hardware_id():
+    """Hash SHA256 degli identificatori hardware (invariati per tutta la vita del processo)"""
+    info = _collect_machine_info()
+
+    # Hash incrementale di "hostname|username|mac|system-machine": stesso digest
+    # della stringa concatenata, senza costruirla. Resta SHA256 perché l'ID è
+    # registrato lato server per le attivazioni esistenti
+    h = hashlib.sha256()
+    for part in (info.hostname, '|', info.username, '|', info.mac, '|', info.system, '-', info.machine):
+        h.update(part.encode())
+    return h.hexdigest()
+
+
+# Salt fisso della chiave locale: la chiave deve restare derivabile dai soli dati della macchina
+_MACHINE_KEY_SALT = b'license_salt_v1_fixed_2025'
+
+
+def _machine_string():
+    """Stringa hostname_username da cui derivare la chiave di cifratura locale"""
+    info = _collect_machine_info()
+    return f"{info.hostname}_{info.username}"
+
+
+# Formato dei file locali: byte di versione + nonce (12 byte) + testo cifrato ChaCha20-Poly1305.
+# I file delle versioni precedenti sono token Fernet (testo base64, mai questo primo byte)
+_BLOB_VERSION = b'\x01'
+_NONCE_SIZE = 12
+
+
+@functools.lru_cache(maxsize=1)
+def _derive_machine_key():
+    """Chiave di 32 byte derivata da hostname + username con BLAKE2b keyed hash"""
+    # Input non segreto: le iterazioni di un KDF lento non aggiungono sicurezza
+    return hashlib.blake2b(
+        _machine_string().encode(),
+        key=_MACHINE_KEY_SALT,
+        digest_size=32
+    ).digest()
+
+
+@functools.lru_cache(maxsize=1)
+def _derive_legacy_machine_key():
+    """Chiave Fernet PBKDF2 delle versioni precedenti (solo per leggere file già salvati)"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=_MACHINE_KEY_SALT,
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(_machine_string().encode()))
+
+
+def _verify_validation_signature(license_key, hardware_id, valid_until, signature):
+    """
+    Verifica la firma del server sul record di validazione
+
+    Returns:
+        bool: True se la firma corrisponde alla chiave pubblica incorporata
+    """
+    if not LICENSE_PUBLIC_KEY or not signature or not isinstance(valid_until, int):
+        return False
+
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+    message = f"{license_key}|{hardware_id}|{valid_until}".encode()
+    try:
+        public_key = Ed25519PublicKey.from_public_bytes(base64.b64decode(LICENSE_PUBLIC_KEY))
+        public_key.verify(base64.b64decode(signature), message)
+        return True
+    except (InvalidSignature, TypeError, ValueError):
+        return False
+
 
 class LicenseManager:
     def __init__(self, license_file=".license.enc", api_url="https://tuosito.com/licenza/api.php"):
@@ -30,7 +227,6 @@ class LicenseManager:
         """
         self.license_file = Path(license_file)
         self.api_url = api_url
-        self.hardware_id = self._generate_hardware_id()
 
     def _generate_hardware_id(self):
         """
@@ -39,65 +235,90 @@ class LicenseManager:
         Returns:
             str: Hash SHA256 dell'hardware ID
         """
-        # Combina più identificatori hardware
-        hostname = platform.node()
-        username = os.getenv('USERNAME') or os.getenv('USER') or 'unknown'
-        mac_address = hex(uuid.getnode())
-        system_info = f"{platform.system()}-{platform.machine()}"
+        return _compute_hardware_id()
+
+    @functools.cached_property
+    def hardware_id(self):
+        """Hardware ID di questa macchina (calcolato al primo accesso)"""
+        return self._generate_hardware_id()
+
+    @functools.cached_property
+    def session(self):
+        """Sessione HTTP condivisa da tutte le chiamate all'API (creata al primo utilizzo)"""
+        return _create_http_session()
+
+    @functools.cached_property
+    def base_payload(self):
+        """Campi fissi presenti in ogni richiesta all'API (hardware ID, hostname, sistema)"""
+        info = _collect_machine_info()
+        return {
+            'hardware_id': self.hardware_id,
+            'hostname': info.hostname,
+            'os': f"{info.system} {info.release}"
+        }
 
-        # Crea una stringa unica
-        unique_string = f"{hostname}|{username}|{mac_address}|{system_info}"
+    def _get_machine_key(self):
+        """Genera una chiave di crittografia basata su machine ID"""
+        return _derive_machine_key()
 
-        # Hash SHA256 per ottenere un ID pulito
-        hardware_id = hashlib.sha256(unique_string.encode()).hexdigest()
+    def _get_machine_key_legacy(self):
+        """Chiave PBKDF2 usata dai file cifrati con le versioni precedenti"""
+        return _derive_legacy_machine_key()
 
-        return hardware_id
+    def _encrypt(self, data):
+        """Cifra i dati di un file locale (ChaCha20-Poly1305, nonce casuale)"""
+        from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 
-    def _get_machine_key(self):
-        """Genera una chiave di crittografia basata su machine ID"""
-        # Usa hostname + username come base per la chiave
-        hostname = platform.node()
-        username = os.getenv('USERNAME') or os.getenv('USER') or 'unknown'
-        machine_string = f"{hostname}_{username}"
-
-        # Usa un salt fisso (per retrocompatibilità con api_key_manager)
-        salt = b'license_salt_v1_fixed_2025'
-
-        # Deriva una chiave usando PBKDF2
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(machine_string.encode()))
-        return key
+        nonce = os.urandom(_NONCE_SIZE)
+        aead = ChaCha20Poly1305(self._get_machine_key())
+        return _BLOB_VERSION + nonce + aead.encrypt(nonce, data, _BLOB_VERSION)
+
+    def _decrypt(self, encrypted_data):
+        """
+        Decifra un file locale, con fallback sul formato Fernet (PBKDF2) precedente
+
+        Returns:
+            tuple: (dati in chiaro, True se il file è in un formato precedente)
+        """
+        if encrypted_data[:1] == _BLOB_VERSION:
+            from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+
+            nonce = encrypted_data[1:1 + _NONCE_SIZE]
+            aead = ChaCha20Poly1305(self._get_machine_key())
+            return aead.decrypt(nonce, encrypted_data[1 + _NONCE_SIZE:], _BLOB_VERSION), False
+
+        from cryptography.fernet import Fernet
+
+        return Fernet(self._get_machine_key_legacy()).decrypt(encrypted_data), True
 
-    def save_license(self, license_key):
+    def save_license(self, license_key, valid_until=None, server_sig=None, validated_at=None):
         """
         Salva la chiave di licenza cifrata localmente
 
         Args:
             license_key: Chiave di licenza da salvare
+            valid_until: Scadenza firmata dal server della validazione online (opzionale)
+            server_sig: Firma del server su license_key|hardware_id|valid_until
+            validated_at: Momento della validazione online (default: adesso)
 
         Returns:
             bool: True se salvata con successo
         """
         try:
-            # Cifra la licenza
-            key = self._get_machine_key()
-            fernet = Fernet(key)
-
             data = {
                 'license_key': license_key,
                 'hardware_id': self.hardware_id
             }
+            if valid_until is not None:
+                data['validated_at'] = time.time() if validated_at is None else validated_at
+                data['valid_until'] = valid_until
+                data['server_sig'] = server_sig
 
-            encrypted_data = fernet.encrypt(json.dumps(data).encode())
+            # Cifra la licenza
+            encrypted_data = self._encrypt(_json_dumps(data))
 
             # Salva su file
-            with open(self.license_file, 'wb') as f:
-                f.write(encrypted_data)
+            self.license_file.write_bytes(encrypted_data)
 
             return True
         except Exception as e:
@@ -111,20 +332,25 @@ class LicenseManager:
         Returns:
             dict: {'license_key': str, 'hardware_id': str} o None se non trovata
         """
-        if not self.license_file.exists():
-            return None
-
         try:
-            # Leggi e decifra
-            with open(self.license_file, 'rb') as f:
-                encrypted_data = f.read()
-
-            key = self._get_machine_key()
-            fernet = Fernet(key)
-            decrypted_data = fernet.decrypt(encrypted_data)
-
-            data = json.loads(decrypted_data.decode())
+            # Leggi e decifra (file assente = nessuna licenza, senza stat preliminare)
+            encrypted_data = self.license_file.read_bytes()
+            decrypted_data, legacy = self._decrypt(encrypted_data)
+
+            data = _json_loads(decrypted_data)
+
+            # Migra il file al formato attuale (Fernet e KDF legacy non serviranno più),
+            # conservando il momento e la firma dell'ultima validazione online
+            if legacy:
+                self.save_license(
+                    data.get('license_key'),
+                    valid_until=data.get('valid_until'),
+                    server_sig=data.get('server_sig'),
+                    validated_at=data.get('validated_at')
+                )
             return data
+        except FileNotFoundError:
+            return None
         except Exception as e:
             print(f"Errore caricamento licenza: {e}")
             return None
@@ -143,38 +369,97 @@ class LicenseManager:
         """Verifica se esiste una licenza salvata"""
         return self.license_file.exists()
 
-    def validate_license_online(self, license_key, timeout=10):
+    def remember_validation(self, license_key, result):
+        """
+        Salva la licenza insieme al record firmato dell'ultima validazione online riuscita
+
+        Senza un record firmato valido (server o client senza chiavi configurate)
+        salva solo la licenza: al prossimo avvio verrà validata online.
+
+        Args:
+            license_key: Chiave di licenza appena validata
+            result: Risposta di validate_license_online (valid_until, signature)
+
+        Returns:
+            bool: True se salvata con successo
+        """
+        valid_until = result.get('valid_until')
+        signature = result.get('signature')
+        if not _verify_validation_signature(license_key, self.hardware_id, valid_until, signature):
+            return self.save_license(license_key)
+        return self.save_license(license_key, valid_until=valid_until, server_sig=signature)
+
+    def is_cached_license_valid(self, license_data=None):
+        """
+        Verifica se la licenza salvata ha una validazione online recente firmata dal server
+
+        La chiave di cifratura del file è derivabile da chiunque usi la macchina:
+        l'unica garanzia è la firma del server, verificata con LICENSE_PUBLIC_KEY.
+
+        Args:
+            license_data: Dati già restituiti da load_license (evita una seconda lettura)
+
+        Returns:
+            bool: True se firma, hardware ID e scadenza sono validi
+        """
+        if license_data is None:
+            license_data = self.load_license()
+        if not license_data:
+            return False
+
+        now = time.time()
+        license_key = license_data.get('license_key')
+        validated_at = license_data.get('validated_at')
+        valid_until = license_data.get('valid_until')
+        if validated_at is None or valid_until is None:
+            return False
+
+        # Scadenza oltre la durata massima o validazione "nel futuro": record non plausibile
+        if validated_at > now + _CLOCK_SKEW:
+            return False
+        if valid_until > validated_at + VALIDATION_CACHE_TTL + _CLOCK_SKEW:
+            return False
+
+        return (license_data.get('hardware_id') == self.hardware_id
+                and now < valid_until
+                and _verify_validation_signature(license_key, self.hardware_id,
+                                                 valid_until, license_data.get('server_sig')))
+
+    def validate_license_online(self, license_key, timeout=VALIDATE_TIMEOUT, app_version=None):
         """
         Valida la licenza online tramite API
 
         Args:
             license_key: Chiave di licenza da validare
-            timeout: Timeout richiesta HTTP in secondi
+            timeout: Timeout richiesta HTTP in secondi (numero o tupla connessione, lettura)
+            app_version: Se indicata, il server registra anche il ping di telemetria
+                (nella stessa richiesta) e risponde con 'ping': True
 
         Returns:
             dict: {'valid': bool, 'message': str, 'license_info': dict}
         """
+        import requests
+
         try:
             # Prepara i dati per la richiesta
             payload = {
                 'action': 'validate',
                 'license_key': license_key,
-                'hardware_id': self.hardware_id,
-                'hostname': platform.node(),
-                'os': f"{platform.system()} {platform.release()}"
+                **self.base_payload
             }
+            if app_version is not None:
+                payload['ping'] = {'app_version': app_version}
 
             # Invia richiesta POST all'API
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                json=payload,
-                timeout=timeout,
-                headers={'Content-Type': 'application/json'}
+                data=_json_dumps(payload),
+                timeout=timeout
             )
 
             # Parse risposta
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 return result
             else:
                 return {
@@ -183,33 +468,19 @@ class LicenseManager:
                     'license_info': None
                 }
 
-        except requests.exceptions.Timeout:
-            return {
-                'valid': False,
-                'message': 'Timeout: impossibile contattare il server di validazione',
-                'license_info': None
-            }
-        except requests.exceptions.ConnectionError:
-            return {
-                'valid': False,
-                'message': 'Errore connessione: verifica la tua connessione internet',
-                'license_info': None
-            }
+        except requests.exceptions.RequestException as e:
+            return _request_error_result(e)
         except Exception as e:
-            return {
-                'valid': False,
-                'message': f'Errore validazione: {str(e)}',
-                'license_info': None
-            }
+            return _validation_error_result(e)
 
-    def send_telemetry(self, license_key, app_version="3.2.2", timeout=5):
+    def send_telemetry(self, license_key, app_version="3.2.2", timeout=TELEMETRY_TIMEOUT):
         """
         Invia telemetria di utilizzo al server (ping)
 
         Args:
             license_key: Chiave di licenza
             app_version: Versione dell'applicazione
-            timeout: Timeout richiesta HTTP in secondi
+            timeout: Timeout (connessione, lettura) in secondi
 
         Returns:
             bool: True se telemetria inviata con successo
@@ -218,17 +489,14 @@ class LicenseManager:
             payload = {
                 'action': 'ping',
                 'license_key': license_key,
-                'hardware_id': self.hardware_id,
-                'hostname': platform.node(),
-                'os': f"{platform.system()} {platform.release()}",
-                'app_version': app_version
+                'app_version': app_version,
+                **self.base_payload
             }
 
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                json=payload,
-                timeout=timeout,
-                headers={'Content-Type': 'application/json'}
+                data=_json_dumps(payload),
+                timeout=timeout
             )
 
             return response.status_code == 200
@@ -238,10 +506,41 @@ class LicenseManager:
             print(f"Telemetria non inviata: {e}")
             return False
 
+    def send_telemetry_async(self, license_key, app_version="3.2.2", timeout=TELEMETRY_TIMEOUT):
+        """
+        Invia la telemetria in un thread daemon senza attenderne l'esito
+
+        Args:
+            license_key: Chiave di licenza
+            app_version: Versione dell'applicazione
+            timeout: Timeout (connessione, lettura) in secondi
+        """
+        thread = threading.Thread(
+            target=self.send_telemetry,
+            args=(license_key, app_version, timeout)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        """Chiude la sessione HTTP e le connessioni aperte verso l'API"""
+        # Sessione mai creata: niente da chiudere (e nessun import di requests)
+        if 'session' in self.__dict__:
+            self.session.close()
+
     def get_hardware_id(self):
         """Restituisce l'hardware ID di questa macchina"""
         return self.hardware_id
 
+    @functools.cached_property
+    def hardware_id_display(self):
+        """Testo (abbreviato) dell'hardware ID mostrato nell'interfaccia"""
+        return f"Hardware ID: {self.hardware_id[:32]}..."
+
+    def get_hardware_id_display(self):
+        """Restituisce l'hardware ID formattato per l'interfaccia"""
+        return self.hardware_id_display
+
 
 # Test rapido
 if __name__ == "__main__":
@@ -21,6 +21,10 @@ header('Access-Control-Allow-Methods: POST');
 
 require_once 'config.php';
 
+// Durata (secondi) del record di validazione firmato: entro questo intervallo
+// il client può avviarsi senza ripetere la validazione online
+const VALIDATION_CACHE_TTL = 86400;
+
 // Leggi input JSON
 $input = file_get_contents('php://input');
 $data = json_decode($input, true);
@@ -156,21 +160,74 @@ function handle_validate($data) {
     $stmt->execute();
     $stmt->close();
 
-    // NON registrare log utilizzo qui - lo fa solo handle_ping()
-    // Questo evita duplicati nel log quando l'app si avvia
+    // Log utilizzo solo se il client ha unito il ping alla validazione
+    // (altrimenti lo fa handle_ping(), evitando duplicati all'avvio)
+    $ping = isset($data['ping']) && is_array($data['ping']);
+    if ($ping) {
+        log_utilizzo($conn, $licenza_id, $hardware_id, $hostname, $os, $data['ping']['app_version'] ?? '');
+    }
 
     $conn->close();
 
     // Risposta successo
-    echo json_encode([
+    $response = [
         'valid' => true,
         'message' => 'Licenza valida',
         'license_info' => [
             'nome' => $license['nome'],
             'cognome' => $license['cognome'],
             'email' => $license['email']
-        ]
-    ]);
+        ],
+        'ping' => $ping
+    ];
+
+    // Record firmato (valid_until, signature) per la cache locale del client
+    $signed = sign_validation($license_key, $hardware_id, $license['data_scadenza']);
+    if ($signed) {
+        $response += $signed;
+    }
+
+    echo json_encode($response);
+}
+
+/**
+ * Firma con Ed25519 il record "license_key|hardware_id|valid_until" di una validazione riuscita
+ * Il client lo verifica con la chiave pubblica incorporata prima di fidarsi della cache locale
+ * @return array|null ['valid_until' => int, 'signature' => base64] o null se la firma non è configurata
+ */
+function sign_validation($license_key, $hardware_id, $data_scadenza) {
+    if (!defined('LICENSE_SIGNING_KEY') || !LICENSE_SIGNING_KEY || !function_exists('sodium_crypto_sign_detached')) {
+        return null;
+    }
+
+    // Mai oltre la scadenza della licenza
+    $valid_until = time() + VALIDATION_CACHE_TTL;
+    if ($data_scadenza) {
+        $scadenza = new DateTime($data_scadenza);
+        $valid_until = min($valid_until, $scadenza->getTimestamp());
+    }
+
+    $message = $license_key . '|' . $hardware_id . '|' . $valid_until;
+    $signature = sodium_crypto_sign_detached($message, base64_decode(LICENSE_SIGNING_KEY));
+
+    return [
+        'valid_until' => $valid_until,
+        'signature' => base64_encode($signature)
+    ];
+}
+
+/**
+ * Registra una riga in log_utilizzo (ping di telemetria)
+ */
+function log_utilizzo($conn, $licenza_id, $hardware_id, $hostname, $os, $app_version) {
+    $ip = $_SERVER['REMOTE_ADDR'] ?? null;
+    $stmt = $conn->prepare("
+        INSERT INTO log_utilizzo (licenza_id, hardware_id, hostname, os_info, app_version, ip_address)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ");
+    $stmt->bind_param('isssss', $licenza_id, $hardware_id, $hostname, $os, $app_version, $ip);
+    $stmt->execute();
+    $stmt->close();
 }
 
 /**
@@ -224,14 +281,7 @@ function handle_ping($data) {
     $stmt->close();
 
     // Registra log utilizzo
-    $ip = $_SERVER['REMOTE_ADDR'] ?? null;
-    $stmt = $conn->prepare("
-        INSERT INTO log_utilizzo (licenza_id, hardware_id, hostname, os_info, app_version, ip_address)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ");
-    $stmt->bind_param('isssss', $licenza_id, $hardware_id, $hostname, $os, $app_version, $ip);
-    $stmt->execute();
-    $stmt->close();
+    log_utilizzo($conn, $licenza_id, $hardware_id, $hostname, $os, $app_version);
 
     $conn->close();
 
@@ -292,6 +342,7 @@ function handle_generate_license($data) {
     if (!$nome || !$cognome || !$email) {
         echo json_encode([
             'success' => false,
+            'error_code' => 'MISSING_FIELDS',
             'message' => 'Nome, cognome ed email sono obbligatori'
         ]);
         return;
@@ -301,6 +352,7 @@ function handle_generate_license($data) {
     if (!filter_var($email, FILTER_VALIDATE_EMAIL)) {
         echo json_encode([
             'success' => false,
+            'error_code' => 'INVALID_EMAIL',
             'message' => 'Email non valida'
         ]);
         return;
@@ -310,6 +362,7 @@ function handle_generate_license($data) {
     if (!$hardware_id) {
         echo json_encode([
             'success' => false,
+            'error_code' => 'MISSING_HARDWARE_ID',
             'message' => 'Hardware ID mancante'
         ]);
         return;
@@ -338,6 +391,7 @@ function handle_generate_license($data) {
 
         echo json_encode([
             'success' => false,
+            'error_code' => 'PC_ALREADY_USED',
             'message' => 'Questo PC ha già generato una licenza',
             'existing_license' => $existing['license_key'],
             'existing_email' => $existing['email']
@@ -383,6 +437,7 @@ function handle_generate_license($data) {
 
         echo json_encode([
             'success' => false,
+            'error_code' => 'CREATE_FAILED',
             'message' => 'Errore creazione licenza'
         ]);
         return;
@@ -24,6 +24,17 @@ define('DB_PASS', 'your_database_password'); // Password database
 define('ADMIN_USERNAME', 'admin');
 define('ADMIN_PASSWORD', 'change_this_password');  // ⚠️ CAMBIA QUESTA PASSWORD!
 
+// ============================================
+// FIRMA VALIDAZIONI (OPZIONALE)
+// Chiave segreta Ed25519 (base64) con cui api.php firma le validazioni riuscite.
+// Generala con:
+//   php -r '$k = sodium_crypto_sign_keypair(); echo base64_encode(sodium_crypto_sign_secretkey($k)), "\n", base64_encode(sodium_crypto_sign_publickey($k)), "\n";'
+// La prima riga va qui, la seconda in LICENSE_PUBLIC_KEY (license_manager.py).
+// Vuota = nessuna firma: il client valida online a ogni avvio
+// ============================================
+
+define('LICENSE_SIGNING_KEY', '');
+
 // ============================================
 // IMPOSTAZIONI APPLICAZIONE
 // ============================================
@@ -8,10 +8,67 @@ Permette di estrarre e mappare tutte le location menzionate nel report
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import re
+import json
+import threading
 from pathlib import Path
 
 
+# Intervallo minimo predefinito tra richieste di geocoding, per provider (ms).
+# Nominatim consente al massimo 1 richiesta al secondo
+_DEFAULT_THROTTLE_MS = {
+    "nominatim": 1100,
+    "google": 50
+}
+
+# Identificativo applicazione nello User-Agent (i termini d'uso di Nominatim lo richiedono)
+_USER_AGENT_APP = "WhatsAppForensicAnalyzer/3.4.0"
+
+# File chunk riconosciuti nella cartella (stesso criterio di LocationAnalyzer)
+_RE_CHUNK_FILE = re.compile(r'^chunk_.+\.(json|txt)$')
+
+# Impostazioni ricordate tra un'apertura e l'altra (la API key Google non viene salvata)
+_SETTINGS_FILE = ".location_dialog.json"
+_PERSISTED_SETTINGS = (
+    "geocoding_provider",
+    "contact_email",
+    "throttle_ms",
+    "batch_size",
+    "hybrid_mode",
+    "google_budget",
+    "confidence_threshold",
+    "context_deduction",
+    "use_geocode_cache",
+    "dedup_enabled",
+    "dedup_epsilon_m",
+    "batch_mode"
+)
+
+# Testi dei tooltip informativi
+_CONFIDENCE_TIP = (
+    "Confidence indica quanto l'AI è sicura che sia una posizione:\n\n"
+    "• Alta (70-100%): Posizioni esplicite chiare\n"
+    "  Es: 'Via Roma 10, Milano', coordinate GPS\n\n"
+    "• Media (40-69%): Luoghi generici o ambigui\n"
+    "  Es: 'al bar', 'in centro'\n\n"
+    "• Bassa (0-39%): Possibili falsi positivi\n"
+    "  Es: nomi propri simili a luoghi"
+)
+
+_CONTEXT_TIP = (
+    "Se attivato, l'AI cerca di dedurre posizioni implicite:\n\n"
+    "Es: 'torno a casa' → cerca l'indirizzo di casa\n"
+    "     nei messaggi precedenti\n\n"
+    "Es: 'ci vediamo al solito posto' → cerca riferimenti\n"
+    "     a luoghi già menzionati\n\n"
+    "⚠️ Può aumentare falsi positivi ma trova più location"
+)
+
 class LocationAnalysisDialog:
+    # Tooltip condiviso da tutte le istanze (creato al primo passaggio del mouse)
+    _tooltip = None
+    _tooltip_label = None
+
     def __init__(self, parent, output_dir, chunks_dir, ai_analyzer):
         """
         Inizializza il dialog per l'analisi delle posizioni geografiche
@@ -26,36 +83,124 @@ class LocationAnalysisDialog:
         self.output_dir = output_dir
         self.chunks_dir = chunks_dir
         self.ai_analyzer = ai_analyzer
+        self._output_path = Path(output_dir)
+        self._chunks_path = Path(chunks_dir)
+
+        # Conteggio chunk in background (su cartelle di rete può richiedere secondi)
+        self._chunk_counts = None
+        self._count_thread = threading.Thread(target=self._scan_chunks, daemon=True)
+        self._count_thread.start()
+
         self.result = None
+        self.chunk_count = 0
 
         # Variabili di configurazione
         self.geocoding_provider = tk.StringVar(value="nominatim")
-        self.google_api_key = tk.StringVar(value="")
+        self.contact_email = tk.StringVar(value="")
+        self.throttle_ms = tk.IntVar(value=_DEFAULT_THROTTLE_MS["nominatim"])
+        self.batch_size = tk.IntVar(value=150)
+
+        # Modalità ibrida: Google per i luoghi più frequenti, Nominatim per il resto
+        self.hybrid_mode = tk.BooleanVar(value=False)
+        self.google_budget = tk.IntVar(value=40000)
+        self._api_key_visible = False
         self.confidence_threshold = tk.IntVar(value=50)  # 0-100%
+        self._confidence_after = None
         self.context_deduction = tk.BooleanVar(value=False)
 
+        # Cache geocoding su disco (riutilizzata dalle analisi successive sullo stesso output)
+        self.cache_path = self._output_path / "geocode_cache.sqlite"
+        self.use_geocode_cache = tk.BooleanVar(value=True)
+
+        # Deduplicazione prima del geocoding (tolleranza in metri per le coordinate)
+        self.dedup_enabled = tk.BooleanVar(value=True)
+        self.dedup_epsilon_m = tk.DoubleVar(value=1.0)
+
+        # Batch API OpenAI: costo dimezzato, risultati entro 24 ore (solo provider OpenAI)
+        self.batch_mode = tk.BooleanVar(value=False)
+        self._batch_supported = ai_analyzer._get_provider_type() == 'openai'
+
         # Variabili modalità test (analisi preliminare)
         self.test_mode = tk.BooleanVar(value=False)
-        self.test_chunks = tk.IntVar(value=5)
+        self.test_chunks = 5
+
+        # Ultima configurazione usata (sovrascrive i valori predefiniti)
+        self._settings_path = Path(_SETTINGS_FILE)
+        self._load_settings()
 
         # Crea dialog modale
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Analisi Posizioni Geografiche")
-        self.dialog.geometry("600x650")
-        self.center_dialog(600, 650)
+        self.center_dialog(600, 660)
         self.dialog.resizable(False, False)
         self.dialog.transient(parent)
-        self.dialog.grab_set()
 
-        self.setup_ui()
+        # Nascosto finché show() non ha costruito i widget (niente sfarfallio);
+        # il grab modale si acquisisce in show(), a finestra visibile
+        self.dialog.withdraw()
+
+    def _load_settings(self):
+        """Carica l'ultima configurazione salvata, ignorando valori non validi"""
+        try:
+            settings = json.loads(self._settings_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(settings, dict):
+            return
+
+        for name in _PERSISTED_SETTINGS:
+            if name not in settings:
+                continue
+            var = getattr(self, name)
+            default = var.get()
+            try:
+                var.set(settings[name])
+                var.get()  # Verifica il tipo: IntVar/DoubleVar accettano qualsiasi stringa in set()
+            except (tk.TclError, TypeError):
+                var.set(default)
+
+        if self.geocoding_provider.get() not in _DEFAULT_THROTTLE_MS:
+            self.geocoding_provider.set("nominatim")
+
+    def _save_settings(self):
+        """Salva la configurazione corrente per la prossima apertura"""
+        settings = {}
+        for name in _PERSISTED_SETTINGS:
+            try:
+                settings[name] = getattr(self, name).get()
+            except tk.TclError:
+                pass
+
+        try:
+            self._settings_path.write_text(json.dumps(settings, indent=2), encoding='utf-8')
+        except OSError:
+            pass
+
+    def _scan_chunks(self):
+        """Conta i file chunk JSON e TXT (una sola lettura della cartella)"""
+        json_count = txt_count = 0
+        try:
+            with os.scandir(self._chunks_path) as entries:
+                for entry in entries:
+                    match = _RE_CHUNK_FILE.match(entry.name)
+                    if not match:
+                        continue
+                    if match.group(1) == "json":
+                        json_count += 1
+                    else:
+                        txt_count += 1
+        except OSError:
+            return
+
+        self._chunk_counts = (json_count, txt_count)
 
     def center_dialog(self, width, height):
-        """Centra il dialog sullo schermo"""
-        self.dialog.update_idletasks()
+        """Centra il dialog sullo schermo (le dimensioni dello schermo non richiedono update_idletasks)"""
         screen_width = self.dialog.winfo_screenwidth()
         screen_height = self.dialog.winfo_screenheight()
-        x = (screen_width // 2) - (width // 2)
-        y = (screen_height // 2) - (height // 2)
+        x = (screen_width - width) // 2
+        y = (screen_height - height) // 2
         self.dialog.geometry(f'{width}x{height}+{x}+{y}')
 
     def setup_ui(self):
@@ -76,8 +221,42 @@ class LocationAnalysisDialog:
         )
         ttk.Label(desc_frame, text=desc_text, justify=tk.LEFT, wraplength=540).pack()
 
+        # === SCHEDE (costruite alla prima apertura, tranne Provider) ===
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
+
+        self._tab_builders = {}
+        for title, builder in (
+            ("Provider", self._build_provider_tab),
+            ("Filtri", self._build_filters_tab),
+            ("Avanzate", self._build_advanced_tab),
+            ("Test", self._build_test_tab)
+        ):
+            tab = ttk.Frame(self.notebook, padding="10")
+            self.notebook.add(tab, text=title)
+            self._tab_builders[str(tab)] = builder
+
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.on_tab_changed()
+
+        # === PULSANTI ===
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=(10, 0))
+
+        ttk.Button(button_frame, text="Annulla", command=self.cancel, width=15).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Avvia Analisi", command=self.start_analysis, width=15).pack(side=tk.LEFT, padx=5)
+
+    def on_tab_changed(self, event=None):
+        """Costruisce i widget della scheda selezionata alla prima apertura"""
+        tab = self.notebook.select()
+        builder = self._tab_builders.pop(tab, None)
+        if builder:
+            builder(self.notebook.nametowidget(tab))
+
+    def _build_provider_tab(self, parent):
+        """Scheda Provider: geocoding, API key Google, rate limiting e contatto"""
         # === GEOCODING PROVIDER ===
-        geo_frame = ttk.LabelFrame(main_frame, text="Provider Geocoding", padding="10")
+        geo_frame = ttk.LabelFrame(parent, text="Provider Geocoding", padding="10")
         geo_frame.pack(fill=tk.X, pady=(0, 15))
 
         # Radio Nominatim
@@ -105,14 +284,78 @@ class LocationAnalysisDialog:
         self.api_key_frame.pack(fill=tk.X, padx=(20, 0), pady=(5, 0))
 
         ttk.Label(self.api_key_frame, text="Google Maps API Key:").pack(anchor=tk.W)
-        self.api_key_entry = ttk.Entry(self.api_key_frame, textvariable=self.google_api_key, width=50)
+        self.api_key_entry = ttk.Entry(self.api_key_frame, width=50)
         self.api_key_entry.pack(fill=tk.X, pady=(2, 0))
 
-        # Nascondi campo API key inizialmente
-        self.api_key_frame.pack_forget()
+        batch_frame = ttk.Frame(self.api_key_frame)
+        batch_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(batch_frame, text="Batch size (Google):").pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Spinbox(
+            batch_frame,
+            from_=1,
+            to=1000,
+            increment=50,
+            textvariable=self.batch_size,
+            width=8
+        ).pack(side=tk.LEFT)
 
+        # Modalità ibrida (richiede la API key Google, quindi vive nello stesso frame)
+        hybrid_frame = ttk.LabelFrame(self.api_key_frame, text="Modalità ibrida", padding="5")
+        hybrid_frame.pack(fill=tk.X, pady=(5, 0))
+
+        ttk.Checkbutton(
+            hybrid_frame,
+            text="Provider ibrido: Google per i luoghi più frequenti, Nominatim per il resto",
+            variable=self.hybrid_mode,
+            command=self.on_hybrid_mode_changed
+        ).pack(anchor=tk.W)
+
+        budget_frame = ttk.Frame(hybrid_frame)
+        budget_frame.pack(fill=tk.X, pady=(2, 0))
+        ttk.Label(budget_frame, text="Google budget (richieste):").pack(side=tk.LEFT, padx=(0, 10))
+        self.google_budget_spinbox = ttk.Spinbox(
+            budget_frame,
+            from_=1,
+            to=1000000,
+            increment=1000,
+            textvariable=self.google_budget,
+            width=10,
+            state='normal' if self.hybrid_mode.get() else 'disabled'
+        )
+        self.google_budget_spinbox.pack(side=tk.LEFT)
+
+        # Campo API key visibile solo se Google è il provider (anche da impostazioni salvate)
+        if self.geocoding_provider.get() == "google":
+            self._api_key_visible = True
+        else:
+            self.api_key_frame.pack_forget()
+
+        # Rate limiting: intervallo minimo tra richieste al provider
+        throttle_frame = ttk.Frame(geo_frame)
+        throttle_frame.pack(fill=tk.X, pady=(8, 0))
+        self.throttle_frame = throttle_frame
+
+        ttk.Label(throttle_frame, text="Intervallo minimo tra richieste (ms):").pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Spinbox(
+            throttle_frame,
+            from_=0,
+            to=5000,
+            increment=50,
+            textvariable=self.throttle_ms,
+            width=8
+        ).pack(side=tk.LEFT)
+
+        # Contatto nello User-Agent (usato da Nominatim, anche in modalità ibrida)
+        contact_frame = ttk.Frame(geo_frame)
+        contact_frame.pack(fill=tk.X, pady=(8, 0))
+
+        ttk.Label(contact_frame, text="Contatto (obbligatorio per Nominatim, es. email):").pack(anchor=tk.W)
+        ttk.Entry(contact_frame, textvariable=self.contact_email, width=50).pack(fill=tk.X, pady=(2, 0))
+
+    def _build_filters_tab(self, parent):
+        """Scheda Filtri: soglia confidence e deduplicazione"""
         # === CONFIDENCE THRESHOLD ===
-        confidence_frame = ttk.LabelFrame(main_frame, text="Soglia Confidence", padding="10")
+        confidence_frame = ttk.LabelFrame(parent, text="Soglia Confidence", padding="10")
         confidence_frame.pack(fill=tk.X, pady=(0, 15))
 
         # Header con label e icona info
@@ -122,21 +365,13 @@ class LocationAnalysisDialog:
         ttk.Label(header_frame, text="Analizza solo posizioni con confidence ≥").pack(side=tk.LEFT)
 
         # Label valore confidence
-        self.confidence_label = ttk.Label(header_frame, text="50%", font=('Arial', 10, 'bold'))
+        self.confidence_label = ttk.Label(header_frame, text=f"{self.confidence_threshold.get()}%", font=('Arial', 10, 'bold'))
         self.confidence_label.pack(side=tk.LEFT, padx=(5, 10))
 
         # Icona info con tooltip
         info_button = tk.Label(header_frame, text="ℹ️", cursor="hand2", font=('Arial', 12))
         info_button.pack(side=tk.LEFT)
-        self.create_tooltip(info_button,
-            "Confidence indica quanto l'AI è sicura che sia una posizione:\n\n"
-            "• Alta (70-100%): Posizioni esplicite chiare\n"
-            "  Es: 'Via Roma 10, Milano', coordinate GPS\n\n"
-            "• Media (40-69%): Luoghi generici o ambigui\n"
-            "  Es: 'al bar', 'in centro'\n\n"
-            "• Bassa (0-39%): Possibili falsi positivi\n"
-            "  Es: nomi propri simili a luoghi"
-        )
+        self.create_tooltip(info_button, _CONFIDENCE_TIP)
 
         # Slider confidence
         self.confidence_slider = ttk.Scale(
@@ -156,8 +391,32 @@ class LocationAnalysisDialog:
         ttk.Label(indicators_frame, text="Media", font=('Arial', 8)).pack(side=tk.LEFT, expand=True)
         ttk.Label(indicators_frame, text="Alta", font=('Arial', 8)).pack(side=tk.RIGHT)
 
+        # === DEDUPLICAZIONE ===
+        dedup_frame = ttk.LabelFrame(parent, text="Deduplicazione", padding="10")
+        dedup_frame.pack(fill=tk.X, pady=(0, 15))
+
+        ttk.Checkbutton(
+            dedup_frame,
+            text="Deduplica posizioni identiche prima del geocoding",
+            variable=self.dedup_enabled
+        ).pack(anchor=tk.W)
+
+        epsilon_frame = ttk.Frame(dedup_frame)
+        epsilon_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(epsilon_frame, text="Tolleranza coordinate (metri):").pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Spinbox(
+            epsilon_frame,
+            from_=0.1,
+            to=1000,
+            increment=0.5,
+            textvariable=self.dedup_epsilon_m,
+            width=8
+        ).pack(side=tk.LEFT)
+
+    def _build_advanced_tab(self, parent):
+        """Scheda Avanzate: deduzione dal contesto, cache geocoding e Batch API"""
         # === DEDUZIONE CONTESTO ===
-        context_frame = ttk.LabelFrame(main_frame, text="Opzioni Avanzate", padding="10")
+        context_frame = ttk.LabelFrame(parent, text="Opzioni Avanzate", padding="10")
         context_frame.pack(fill=tk.X, pady=(0, 15))
 
         # Frame checkbox + info
@@ -173,17 +432,25 @@ class LocationAnalysisDialog:
         # Icona info deduzione contesto
         context_info_button = tk.Label(checkbox_frame, text="ℹ️", cursor="hand2", font=('Arial', 12))
         context_info_button.pack(side=tk.LEFT, padx=(5, 0))
-        self.create_tooltip(context_info_button,
-            "Se attivato, l'AI cerca di dedurre posizioni implicite:\n\n"
-            "Es: 'torno a casa' → cerca l'indirizzo di casa\n"
-            "     nei messaggi precedenti\n\n"
-            "Es: 'ci vediamo al solito posto' → cerca riferimenti\n"
-            "     a luoghi già menzionati\n\n"
-            "⚠️ Può aumentare falsi positivi ma trova più location"
-        )
+        self.create_tooltip(context_info_button, _CONTEXT_TIP)
+
+        ttk.Checkbutton(
+            context_frame,
+            text="Usa cache geocoding (evita di ripetere richieste per posizioni già risolte)",
+            variable=self.use_geocode_cache
+        ).pack(anchor=tk.W, pady=(5, 0))
 
+        ttk.Checkbutton(
+            context_frame,
+            text="Usa Batch API OpenAI (costo -50%, risultati entro 24 ore)",
+            variable=self.batch_mode,
+            state='normal' if self._batch_supported else 'disabled'
+        ).pack(anchor=tk.W, pady=(5, 0))
+
+    def _build_test_tab(self, parent):
+        """Scheda Test: analisi limitata a pochi chunk"""
         # === MODALITÀ TEST ===
-        test_frame = ttk.LabelFrame(main_frame, text="Modalità Test", padding="10")
+        test_frame = ttk.LabelFrame(parent, text="Modalità Test", padding="10")
         test_frame.pack(fill=tk.X, pady=(0, 15))
 
         self.test_mode_check = ttk.Checkbutton(
@@ -203,10 +470,10 @@ class LocationAnalysisDialog:
             spinbox_frame,
             from_=1,
             to=100,
-            textvariable=self.test_chunks,
-            width=10,
-            state='disabled'
+            width=10
         )
+        self.test_chunks_spinbox.set(self.test_chunks)
+        self.test_chunks_spinbox.config(state='disabled')
         self.test_chunks_spinbox.pack(side=tk.LEFT)
 
         ttk.Label(
@@ -216,22 +483,31 @@ class LocationAnalysisDialog:
             foreground='gray'
         ).pack(side=tk.LEFT, padx=(10, 0))
 
-        # === PULSANTI ===
-        button_frame = ttk.Frame(main_frame)
-        button_frame.pack(pady=(10, 0))
+    def on_provider_change(self):
+        """Mostra/nasconde campo API key e adegua il rate limiting al provider selezionato"""
+        provider = self.geocoding_provider.get()
+        want_api_key = provider == "google"
 
-        ttk.Button(button_frame, text="Annulla", command=self.cancel, width=15).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Avvia Analisi", command=self.start_analysis, width=15).pack(side=tk.LEFT, padx=5)
+        # Click sul provider già selezionato: nessun ricalcolo del layout
+        if want_api_key == self._api_key_visible:
+            return
+        self._api_key_visible = want_api_key
 
-    def on_provider_change(self):
-        """Mostra/nasconde campo API key in base al provider selezionato"""
-        if self.geocoding_provider.get() == "google":
-            self.api_key_frame.pack(fill=tk.X, padx=(20, 0), pady=(5, 0))
+        if want_api_key:
+            self.api_key_frame.pack(fill=tk.X, padx=(20, 0), pady=(5, 0), before=self.throttle_frame)
         else:
             self.api_key_frame.pack_forget()
+        self.throttle_ms.set(_DEFAULT_THROTTLE_MS[provider])
 
     def on_confidence_change(self, value):
-        """Aggiorna label quando lo slider cambia"""
+        """Aggiorna label quando lo slider cambia (un solo aggiornamento per ciclo idle)"""
+        if self._confidence_after:
+            self.dialog.after_cancel(self._confidence_after)
+        self._confidence_after = self.dialog.after_idle(self._update_confidence_label, value)
+
+    def _update_confidence_label(self, value):
+        """Applica l'ultimo valore dello slider alla label"""
+        self._confidence_after = None
         self.confidence_label.config(text=f"{int(float(value))}%")
 
     def on_test_mode_changed(self):
@@ -241,6 +517,13 @@ class LocationAnalysisDialog:
         else:
             self.test_chunks_spinbox.config(state='disabled')
 
+    def on_hybrid_mode_changed(self):
+        """Abilita/disabilita il budget Google in base alla modalità ibrida"""
+        if self.hybrid_mode.get():
+            self.google_budget_spinbox.config(state='normal')
+        else:
+            self.google_budget_spinbox.config(state='disabled')
+
     def create_tooltip(self, widget, text):
         """
         Crea un tooltip per un widget
@@ -250,33 +533,42 @@ class LocationAnalysisDialog:
             text: Testo del tooltip
         """
         def show_tooltip(event):
-            tooltip = tk.Toplevel()
-            tooltip.wm_overrideredirect(True)
-            tooltip.wm_geometry(f"+{event.x_root + 10}+{event.y_root + 10}")
-
-            label = tk.Label(
-                tooltip,
-                text=text,
-                justify=tk.LEFT,
-                background="#ffffe0",
-                relief=tk.SOLID,
-                borderwidth=1,
-                font=('Arial', 9),
-                padx=10,
-                pady=5
-            )
-            label.pack()
+            cls = LocationAnalysisDialog
+
+            # Finestra tooltip unica, creata al primo passaggio e poi riutilizzata
+            if cls._tooltip is None or not cls._tooltip.winfo_exists():
+                cls._tooltip = tk.Toplevel(self.parent)
+                cls._tooltip.wm_overrideredirect(True)
+                cls._tooltip.withdraw()
+
+                cls._tooltip_label = tk.Label(
+                    cls._tooltip,
+                    justify=tk.LEFT,
+                    background="#ffffe0",
+                    relief=tk.SOLID,
+                    borderwidth=1,
+                    font=('Arial', 9),
+                    padx=10,
+                    pady=5
+                )
+                cls._tooltip_label.pack()
 
-            # Salva riferimento al tooltip
-            widget.tooltip = tooltip
+            cls._tooltip_label.config(text=text)
+            cls._tooltip.wm_geometry(f"+{event.x_root + 10}+{event.y_root + 10}")
+            cls._tooltip.deiconify()
+            cls._tooltip.lift()
 
         def hide_tooltip(event):
-            if hasattr(widget, 'tooltip'):
-                widget.tooltip.destroy()
-                del widget.tooltip
+            LocationAnalysisDialog._hide_tooltip()
+
+        widget.bind("<Enter>", show_tooltip, add='+')
+        widget.bind("<Leave>", hide_tooltip, add='+')
 
-        widget.bind("<Enter>", show_tooltip)
-        widget.bind("<Leave>", hide_tooltip)
+    @classmethod
+    def _hide_tooltip(cls):
+        """Nasconde il tooltip condiviso (se presente)"""
+        if cls._tooltip is not None and cls._tooltip.winfo_exists():
+            cls._tooltip.withdraw()
 
     def validate_config(self):
         """
@@ -286,7 +578,7 @@ class LocationAnalysisDialog:
             bool: True se valida, False altrimenti
         """
         # Verifica cartella output esiste
-        if not os.path.exists(self.output_dir):
+        if not self._output_path.is_dir():
             messagebox.showerror(
                 "Errore",
                 f"Cartella output non trovata:\n{self.output_dir}"
@@ -294,7 +586,7 @@ class LocationAnalysisDialog:
             return False
 
         # Verifica presenza cartella chunk
-        if not os.path.exists(self.chunks_dir):
+        if not self._chunks_path.is_dir():
             messagebox.showerror(
                 "Errore",
                 f"Cartella chunk non trovata:\n{self.chunks_dir}\n\n"
@@ -303,12 +595,14 @@ class LocationAnalysisDialog:
             )
             return False
 
-        # Conta chunk disponibili
-        from glob import glob
-        json_chunks = glob(os.path.join(self.chunks_dir, "chunk_*.json"))
-        txt_chunks = glob(os.path.join(self.chunks_dir, "chunk_*.txt"))
+        # Conteggio chunk avviato in __init__: di norma già concluso
+        self._count_thread.join()
+        if self._chunk_counts is None:
+            self._scan_chunks()
+        json_count, txt_count = self._chunk_counts or (0, 0)
+        self.chunk_count = json_count + txt_count
 
-        if not json_chunks and not txt_chunks:
+        if not (json_count or txt_count):
             messagebox.showerror(
                 "Errore",
                 f"Nessun chunk trovato nella cartella:\n{self.chunks_dir}\n\n"
@@ -316,9 +610,58 @@ class LocationAnalysisDialog:
             )
             return False
 
-        # Verifica API key se Google Maps selezionato
+        # Verifica intervallo rate limiting (lo Spinbox accetta testo libero)
+        try:
+            throttle_ms = self.throttle_ms.get()
+        except tk.TclError:
+            throttle_ms = -1
+        if throttle_ms < 0:
+            messagebox.showerror(
+                "Errore",
+                "L'intervallo minimo tra richieste deve essere un numero intero ≥ 0 (ms)."
+            )
+            return False
+
+        # Verifica numero chunk della modalità test (letto direttamente dallo Spinbox)
+        if self.test_mode.get():
+            try:
+                test_chunks = int(self.test_chunks_spinbox.get())
+            except ValueError:
+                test_chunks = 0
+            if test_chunks < 1:
+                messagebox.showerror(
+                    "Errore",
+                    "Il numero di chunk da analizzare deve essere un numero intero ≥ 1."
+                )
+                return False
+            self.test_chunks = test_chunks
+
+        # Verifica tolleranza deduplicazione
+        if self.dedup_enabled.get():
+            try:
+                epsilon_m = self.dedup_epsilon_m.get()
+            except tk.TclError:
+                epsilon_m = 0
+            if epsilon_m <= 0:
+                messagebox.showerror(
+                    "Errore",
+                    "La tolleranza di deduplicazione deve essere un numero > 0 (metri)."
+                )
+                return False
+
+        # Verifica contatto per Nominatim (provider scelto o coda della modalità ibrida)
+        uses_nominatim = self.geocoding_provider.get() == "nominatim" or self.hybrid_mode.get()
+        if uses_nominatim and not self.contact_email.get().strip():
+            messagebox.showerror(
+                "Errore",
+                "Nominatim richiede un contatto (es. email) nello User-Agent.\n"
+                "Inseriscilo nel campo \"Contatto\"."
+            )
+            return False
+
+        # Verifica API key e batch size se Google Maps selezionato
         if self.geocoding_provider.get() == "google":
-            api_key = self.google_api_key.get().strip()
+            api_key = self.api_key_entry.get().strip()
             if not api_key:
                 messagebox.showerror(
                     "Errore",
@@ -327,6 +670,29 @@ class LocationAnalysisDialog:
                 )
                 return False
 
+            try:
+                batch_size = self.batch_size.get()
+            except tk.TclError:
+                batch_size = 0
+            if not 1 <= batch_size <= 1000:
+                messagebox.showerror(
+                    "Errore",
+                    "Il batch size per Google deve essere un numero intero tra 1 e 1000."
+                )
+                return False
+
+            if self.hybrid_mode.get():
+                try:
+                    google_budget = self.google_budget.get()
+                except tk.TclError:
+                    google_budget = 0
+                if google_budget < 1:
+                    messagebox.showerror(
+                        "Errore",
+                        "Il budget Google della modalità ibrida deve essere un numero intero ≥ 1."
+                    )
+                    return False
+
         return True
 
     def start_analysis(self):
@@ -334,20 +700,42 @@ class LocationAnalysisDialog:
         if not self.validate_config():
             return
 
+        # Modalità ibrida valida solo con Google selezionato (API key disponibile)
+        hybrid_mode = self.geocoding_provider.get() == "google" and self.hybrid_mode.get()
+
         # Prepara configurazione
         self.result = {
             'geocoding_provider': self.geocoding_provider.get(),
-            'google_api_key': self.google_api_key.get().strip() if self.geocoding_provider.get() == "google" else None,
+            'google_api_key': self.api_key_entry.get().strip() if self.geocoding_provider.get() == "google" else None,
             'confidence_threshold': self.confidence_threshold.get(),
             'context_deduction': self.context_deduction.get(),
             'output_dir': self.output_dir,
             'chunks_dir': self.chunks_dir,
             'test_mode': self.test_mode.get(),
-            'test_chunks': self.test_chunks.get()
+            'test_chunks': self.test_chunks,
+            'chunk_count': self.chunk_count,
+            'throttle_ms': self.throttle_ms.get(),
+            'user_agent': self._build_user_agent(),
+            'batch_size': self.batch_size.get() if self.geocoding_provider.get() == "google" else None,
+            'hybrid_mode': hybrid_mode,
+            'google_budget': self.google_budget.get() if hybrid_mode else None,
+            'geocode_cache': self.use_geocode_cache.get(),
+            'dedup': {
+                'enabled': self.dedup_enabled.get(),
+                'epsilon_m': self.dedup_epsilon_m.get() if self.dedup_enabled.get() else None
+            },
+            'cache_path': str(self.cache_path),
+            'batch_mode': self.batch_mode.get() and self._batch_supported and not self.test_mode.get()
         }
 
+        self._save_settings()
         self.dialog.destroy()
 
+    def _build_user_agent(self):
+        """User-Agent con nome/versione dell'applicazione e contatto dell'utente"""
+        contact = self.contact_email.get().strip()
+        return f"{_USER_AGENT_APP} ({contact})" if contact else _USER_AGENT_APP
+
     def cancel(self):
         """Annulla l'operazione"""
         self.result = None
@@ -360,5 +748,12 @@ class LocationAnalysisDialog:
         Returns:
             dict or None: Configurazione se confermata, None se annullata
         """
+        # Widget costruiti qui, a finestra ancora nascosta, poi mostrata una sola volta
+        self.setup_ui()
+        self.dialog.deiconify()
+        self.dialog.wait_visibility()
+        self.dialog.grab_set()
+
         self.dialog.wait_window()
+        self._hide_tooltip()
         return self.result
@@ -6,11 +6,390 @@ Gestisce LLM analysis, geocoding APIs e normalizzazione dati
 """
 
 import os
+import re
+import math
+import random
 import json
 import time
+import tempfile
+import threading
+from datetime import datetime, timezone
 import requests
-from glob import glob
+from requests.adapters import HTTPAdapter
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from urllib.parse import urlencode
+import openai
+import anthropic
+from geocode_cache import GeocodeCache, normalize_address
+from extraction_checkpoint import ExtractionCheckpoint
+
+# orjson opzionale: parsing più veloce di risposte LLM e chunk JSON
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# NumPy opzionale: medie dei gruppi vettorializzate in normalize_and_deduplicate
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# rapidfuzz opzionale: varianti quasi identiche dello stesso indirizzo geocodificate una volta
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+
+# Richieste Google in parallelo al massimo all'interno di un blocco
+_GOOGLE_MAX_WORKERS = 8
+
+# Buffer di lettura dei file chunk
+_CHUNK_READ_BUFFER = 1 << 16
+
+# Estrazione LLM parallela con concorrenza adattiva (AIMD)
+_LLM_START_CONCURRENCY = 2
+_LLM_MAX_CONCURRENCY = 8
+_LLM_TARGET_LATENCY = 8.0  # secondi (media sulle ultime chiamate)
+_LLM_LATENCY_WINDOW = 10
+
+# Tentativi per errori temporanei (backoff esponenziale con jitter, max 30s)
+_MAX_ATTEMPTS = 3
+_RETRY_BASE_WAIT = 1.0
+_RETRY_MAX_WAIT = 30.0
+
+# Timeout (connessione, lettura) in secondi
+_GEOCODE_TIMEOUT = (5, 10)
+_OLLAMA_TIMEOUT = (5, 300)
+_LLM_TIMEOUT = 120.0
+
+# Errori di rete da ritentare (gli SDK li sollevano "from" l'eccezione httpx sottostante)
+_CONNECTION_ERRORS = (openai.APIConnectionError, anthropic.APIConnectionError,
+                      requests.ConnectionError, requests.Timeout)
+_TIMEOUT_ERRORS = (openai.APITimeoutError, anthropic.APITimeoutError, requests.Timeout)
+
+# Token residui sotto cui attendere il reset della finestra del provider
+_LLM_TOKEN_RESERVE = 6000
+
+# Durate negli header di rate limit OpenAI (es. "6m0s", "120ms")
+_RE_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+# User-Agent per Nominatim se il dialog non ne fornisce uno con contatto
+_DEFAULT_USER_AGENT = 'WhatsAppForensicAnalyzer/3.4.0'
+
+# Status Google Geocoding che non sono un risultato: quota esaurita (da ritentare)
+# e gli altri errori; mai salvati in cache come "non trovato"
+_GOOGLE_RESULT_STATUSES = ('OK', 'ZERO_RESULTS')
+_GOOGLE_QUOTA_STATUS = 'OVER_QUERY_LIMIT'
+
+# Intervallo minimo tra richieste Nominatim in modalità ibrida (max 1 richiesta/s)
+_NOMINATIM_MIN_DELAY = 1.1
+
+# Deduplicazione prima del geocoding: coordinate esplicite "lat, lon" e metri per grado
+_RE_COORDINATES = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*$')
+_METERS_PER_DEGREE = 111000
+
+# Deduplicazione approssimata: similarità minima (token_sort_ratio) tra testi con gli stessi numeri
+_FUZZY_MIN_SCORE = 92
+_RE_DIGITS = re.compile(r'\d+')
+
+# Coppia di coordinate decimali dentro un testo (es. "posizione: 45.4642, 9.1899")
+_RE_COORDINATES_IN_TEXT = re.compile(r'([-+]?\d{1,3}\.\d+)\s*[,;\s]\s*([-+]?\d{1,3}\.\d+)')
+
+# Fallback parsing risposte LLM: dal primo { all'ultimo } (testo attorno al JSON)
+_RE_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+
+# Prompt di estrazione: istruzioni fisse nel messaggio di sistema, per chunk si invia solo il testo
+_PROMPT_HEADER = """Estrai TUTTE le posizioni geografiche menzionate nel testo dell'utente.
+
+Campi per ogni posizione:
+- location_text: testo esatto della posizione (es. "Via Roma 10, Milano")
+- location_type: coordinates (GPS, es. "45.464204, 9.189982") | address (indirizzo completo) | place_name (città, vie, piazze) | poi (es. "bar centrale", "stazione")
+- sender: mittente, altrimenti "Unknown"
+- timestamp: data/ora come appare nel testo, altrimenti null
+- message_context: frase in cui appare (max 200 caratteri)
+- confidence_score: 0-100; 80+ esplicita (coordinate, indirizzi), 50-79 luogo nominato, 20-49 generico/ambiguo ("al bar", "in centro"), <20 possibile falso positivo (nomi propri, metafore)
+"""
+
+_PROMPT_CONTEXT_BLOCK = """
+Deduci anche posizioni implicite ("torno a casa", "al solito posto", luoghi già discussi) dai messaggi precedenti: confidence_score 30-60 e nota nel message_context.
+"""
+
+_PROMPT_OUTPUT_FORMAT = """
+Rispondi SOLO con JSON valido:
+{"locations": [{"location_text": "...", "location_type": "...", "sender": "...", "timestamp": "... o null", "message_context": "...", "confidence_score": 0}]}"""
+
+_SYSTEM_PROMPT = _PROMPT_HEADER + _PROMPT_OUTPUT_FORMAT
+_SYSTEM_PROMPT_CONTEXT = _PROMPT_HEADER + _PROMPT_CONTEXT_BLOCK + _PROMPT_OUTPUT_FORMAT
+
+_PROMPT_SUFFIX = """
+
+JSON:"""
+
+# Token di risposta: circa 1 ogni 8 caratteri del chunk, entro questi limiti
+_RESPONSE_CHARS_PER_TOKEN = 8
+_RESPONSE_MIN_TOKENS = 1024
+_RESPONSE_MAX_TOKENS = 4000
+
+# Batch API OpenAI: intervallo di polling (secondi) e stati finali del batch
+_BATCH_POLL_INTERVAL = 30
+_BATCH_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Checkpoint dell'estrazione nella cartella output (eliminato ad analisi completata)
+_CHECKPOINT_FILE = "location_extraction_checkpoint.jsonl"
+
+# Output strutturato: schema delle posizioni per il tool use di Anthropic
+_LOCATIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "locations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "location_text": {"type": "string"},
+                    "location_type": {
+                        "type": "string",
+                        "enum": ["coordinates", "address", "place_name", "poi"]
+                    },
+                    "sender": {"type": "string"},
+                    "timestamp": {"type": ["string", "null"]},
+                    "message_context": {"type": "string"},
+                    "confidence_score": {"type": "integer", "minimum": 0, "maximum": 100}
+                },
+                "required": ["location_text", "location_type", "confidence_score"]
+            }
+        }
+    },
+    "required": ["locations"]
+}
+
+_ANTHROPIC_LOCATIONS_TOOL = {
+    "name": "emit_locations",
+    "description": "Restituisce le posizioni geografiche estratte dal testo",
+    "input_schema": _LOCATIONS_SCHEMA
+}
+
+
+class GeocodingRateLimitError(Exception):
+    """Quota del servizio di geocoding esaurita (HTTP 200 con status OVER_QUERY_LIMIT)"""
+
+
+class RateLimiter:
+    """Limita le richieste a max_calls ogni period secondi (finestra scorrevole, thread-safe)"""
+
+    def __init__(self, max_calls, period):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Attende finché una nuova richiesta rientra nel limite, poi la registra"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+
+                time.sleep(self.period - (now - self._calls[0]))
+
+
+def _rate_limiter_for(delay):
+    """
+    RateLimiter equivalente a un intervallo minimo tra richieste
+
+    Intervalli sotto il secondo diventano N richieste/secondo (es. 50 ms → 20/s),
+    gli altri 1 richiesta ogni `delay` secondi. None se non serve limitare.
+    """
+    if delay <= 0:
+        return None
+    if delay < 1:
+        return RateLimiter(max(1, int(1 / delay)), 1.0)
+    return RateLimiter(1, delay)
+
+
+class RateLimitState:
+    """
+    Stato dei limiti del provider LLM letto dagli header delle risposte
+
+    OpenAI: x-ratelimit-remaining-tokens / x-ratelimit-reset-tokens (es. "6m0s")
+    Anthropic: anthropic-ratelimit-tokens-remaining / -tokens-reset (RFC 3339)
+    Entrambi: retry-after (secondi) sulle risposte 429
+    """
+
+    def __init__(self, token_reserve=_LLM_TOKEN_RESERVE):
+        self.token_reserve = token_reserve
+        self.has_headers = False
+        self._remaining_tokens = None
+        self._reset_at = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        """Aggiorna lo stato dagli header di una risposta (o di un errore 429)"""
+        if not headers:
+            return
+
+        remaining = headers.get('x-ratelimit-remaining-tokens') or headers.get('anthropic-ratelimit-tokens-remaining')
+        reset = headers.get('x-ratelimit-reset-tokens') or headers.get('anthropic-ratelimit-tokens-reset')
+        retry_after = headers.get('retry-after')
+        now = time.monotonic()
+
+        with self._lock:
+            if remaining is not None:
+                try:
+                    self._remaining_tokens = int(float(remaining))
+                    self.has_headers = True
+                except ValueError:
+                    pass
+            if reset:
+                seconds = _parse_reset_seconds(reset)
+                if seconds is not None:
+                    self._reset_at = now + seconds
+            if retry_after:
+                try:
+                    self._retry_at = max(self._retry_at, now + float(retry_after))
+                except ValueError:
+                    pass
+
+    def wait(self):
+        """Attende se il provider ha chiesto una pausa o se i token residui sono sotto la riserva"""
+        with self._lock:
+            now = time.monotonic()
+            pause = self._retry_at - now
+            if self._remaining_tokens is not None and self._remaining_tokens < self.token_reserve:
+                pause = max(pause, self._reset_at - now)
+                # La finestra si rinnova dopo il reset: riparte dal prossimo header
+                self._remaining_tokens = None
+
+        if pause > 0:
+            time.sleep(pause)
+
+
+def _parse_reset_seconds(value):
+    """Secondi al reset da durata OpenAI ("1m30s", "250ms") o timestamp Anthropic (RFC 3339)"""
+    parts = _RE_DURATION.findall(value)
+    if parts and _RE_DURATION.sub('', value).strip() == '':
+        return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+    try:
+        reset = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+
+
+def _json_loads(data):
+    """Deserializza JSON (str o bytes), con orjson se disponibile"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _parse_coordinates(location):
+    """
+    Legge le coordinate scritte esplicitamente nel testo della posizione
+
+    Le posizioni di tipo 'coordinates' possono contenere altro testo attorno
+    alla coppia; per gli altri tipi il testo deve essere solo la coppia decimale.
+
+    Returns:
+        tuple: (lat, lon) se valide, altrimenti None
+    """
+    text = location['location_text']
+    if location.get('location_type') == 'coordinates':
+        match = _RE_COORDINATES.match(text) or _RE_COORDINATES_IN_TEXT.search(text)
+    else:
+        match = _RE_COORDINATES_IN_TEXT.fullmatch(text.strip())
+    if not match:
+        return None
+
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+def _chunk_number(stem):
+    """
+    Chiave di ordinamento di un file chunk dal numero nel nome
+
+    chunk_1000 segue chunk_999 anche se la numerazione supera le cifre
+    di riempimento; nomi non numerici vanno in coda.
+    """
+    try:
+        return 0, int(stem), stem
+    except ValueError:
+        return 1, 0, stem
+
+
+def _response_max_tokens(text):
+    """Token di risposta proporzionati alla lunghezza del chunk (entro i limiti)"""
+    return min(_RESPONSE_MAX_TOKENS, max(_RESPONSE_MIN_TOKENS, len(text) // _RESPONSE_CHARS_PER_TOKEN))
+
+
+def _error_chain(error):
+    """L'errore sollevato e poi le sue cause (raise ... from), dalla più esterna"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__
+
+
+def _is_backpressure_error(error):
+    """True se l'errore indica un provider sotto carico (429, 5xx o timeout)"""
+    for exc in _error_chain(error):
+        if isinstance(exc, _TIMEOUT_ERRORS):
+            return True
+        status = getattr(exc, 'status_code', None)
+        if status is None:
+            status = getattr(getattr(exc, 'response', None), 'status_code', None)
+        if isinstance(status, int) and (status == 429 or status >= 500):
+            return True
+        name = type(exc).__name__
+        if 'Timeout' in name or 'RateLimit' in name:
+            return True
+    return False
+
+
+def _is_transient_error(error):
+    """True per errori che conviene ritentare (provider sotto carico o rete)"""
+    if _is_backpressure_error(error):
+        return True
+    return any(isinstance(exc, _CONNECTION_ERRORS) for exc in _error_chain(error))
+
+
+def _create_http_session(user_agent):
+    """
+    Sessione HTTP condivisa (keep-alive e pool di connessioni) per geocoding e Ollama
+
+    Args:
+        user_agent: User-Agent inviato a tutti i servizi
+
+    Returns:
+        requests.Session: Sessione senza retry interni: i tentativi passano da
+        _with_retries, così ogni nuova richiesta di geocoding rispetta il RateLimiter
+    """
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = user_agent
+    return session
 
 
 class LocationAnalyzer:
@@ -31,6 +410,22 @@ class LocationAnalyzer:
 
         self.locations = []
         self.geocoding_errors = []
+        self.chunks_processed = 0
+
+        # Limiti del provider LLM dagli header delle risposte
+        self._rate_state = RateLimitState()
+
+        # Pause chieste dai servizi di geocoding (retry-after), separate da quelle dell'LLM
+        self._geocode_rate_state = RateLimitState()
+
+        # JSON mode OpenAI: disattivato al primo rifiuto del modello
+        self._json_mode = True
+
+        # Risultati dell'estrazione salvati chunk per chunk (aperto da analyze)
+        self._checkpoint = None
+
+        # Connessioni riutilizzate tra le richieste (niente handshake TLS ogni volta)
+        self.http = _create_http_session(config.get('user_agent') or _DEFAULT_USER_AGENT)
 
     def log(self, message):
         """Invia messaggio al log se callback disponibile"""
@@ -42,179 +437,485 @@ class LocationAnalyzer:
         if self.progress_callback:
             self.progress_callback(value)
 
-    def _call_llm(self, prompt, max_tokens=4000, temperature=0.3):
+    def _call_llm(self, prompt, max_tokens=4000, temperature=0.3, system=None):
         """
-        Chiama l'LLM configurato in AIAnalyzer
+        Chiama l'LLM configurato in AIAnalyzer, ritentando gli errori temporanei
 
         Args:
-            prompt: Prompt da inviare
+            prompt: Prompt da inviare (messaggio utente)
             max_tokens: Max token di risposta
             temperature: Temperatura (0.0 - 1.0)
+            system: Istruzioni di sistema (opzionale)
 
         Returns:
-            str: Risposta del modello
+            str | dict: Risposta del modello (dict se già strutturata dal tool use)
         """
         try:
-            if self.ai_analyzer.use_local:
-                # Ollama locale
-                response = requests.post(
-                    f"{self.ai_analyzer.local_url}/api/generate",
-                    json={
-                        "model": self.ai_analyzer.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": temperature,
-                            "num_predict": max_tokens
-                        }
-                    },
-                    timeout=300
-                )
-                response.raise_for_status()
-                return response.json()['response']
-
-            elif self.ai_analyzer.is_anthropic:
-                # Anthropic Claude
-                message = self.ai_analyzer.client.messages.create(
-                    model=self.ai_analyzer.model,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return message.content[0].text
+            return self._with_retries(self._request_llm, prompt, max_tokens, temperature, system)
+        except Exception as e:
+            raise Exception(f"Errore chiamata LLM: {str(e)}") from e
 
-            else:
-                # OpenAI / Azure OpenAI
-                response = self.ai_analyzer.client.chat.completions.create(
-                    model=self.ai_analyzer.model,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return response.choices[0].message.content
+    def _with_retries(self, func, *args, rate_state=None):
+        """
+        Esegue func ritentando fino a _MAX_ATTEMPTS volte gli errori temporanei
+        (429, 5xx, timeout, connessione) con backoff esponenziale e jitter
 
-        except Exception as e:
-            raise Exception(f"Errore chiamata LLM: {str(e)}")
+        Args:
+            rate_state: RateLimitState che registra il retry-after dei 429
+                        (default: quello del provider LLM)
 
-    def load_chunks(self, chunks_dir):
+        Returns:
+            Il valore restituito da func
+        """
+        rate_state = rate_state or self._rate_state
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                return func(*args)
+            except Exception as e:
+                if attempt == _MAX_ATTEMPTS or not _is_transient_error(e):
+                    raise
+
+                # Su 429 il provider indica quanto attendere (retry-after)
+                response = getattr(e, 'response', None)
+                if getattr(response, 'status_code', None) == 429:
+                    rate_state.update(response.headers)
+
+                pause = random.uniform(0, min(_RETRY_MAX_WAIT, _RETRY_BASE_WAIT * 2 ** attempt))
+                self.log(f"   🔁 Errore temporaneo ({e}): tentativo {attempt + 1}/{_MAX_ATTEMPTS} tra {pause:.1f}s")
+                time.sleep(pause)
+                rate_state.wait()
+
+    def _request_llm(self, prompt, max_tokens, temperature, system=None):
+        """Singola richiesta al provider LLM configurato"""
+        if self.ai_analyzer.use_local:
+            # Ollama locale
+            response = self.http.post(
+                f"{self.ai_analyzer.local_url}/api/generate",
+                json={
+                    "model": self.ai_analyzer.model,
+                    "prompt": prompt,
+                    "system": system or "",
+                    "stream": False,
+                    "format": "json",
+                    "options": {
+                        "temperature": temperature,
+                        "num_predict": max_tokens
+                    }
+                },
+                timeout=_OLLAMA_TIMEOUT
+            )
+            response.raise_for_status()
+            return response.json()['response']
+
+        # Timeout esplicito e nessun retry interno all'SDK: i tentativi li gestisce _with_retries
+        client = self.ai_analyzer.client.with_options(timeout=_LLM_TIMEOUT, max_retries=0)
+
+        if self.ai_analyzer.is_anthropic:
+            # Anthropic Claude: tool use forzato, l'input del tool è già un dict
+            # (risposta raw per leggere gli header di rate limit)
+            kwargs = {'system': system} if system else {}
+            raw = client.messages.with_raw_response.create(
+                model=self.ai_analyzer.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                tools=[_ANTHROPIC_LOCATIONS_TOOL],
+                tool_choice={"type": "tool", "name": _ANTHROPIC_LOCATIONS_TOOL["name"]},
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                **kwargs
+            )
+            self._rate_state.update(raw.headers)
+            message = raw.parse()
+            for block in message.content:
+                if block.type == 'tool_use':
+                    return block.input
+            return message.content[0].text
+
+        # OpenAI / Azure OpenAI: JSON mode se il deployment lo supporta
+        # (risposta raw per leggere gli header di rate limit)
+        kwargs = {}
+        if self._json_mode:
+            kwargs['response_format'] = {"type": "json_object"}
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        try:
+            raw = client.chat.completions.with_raw_response.create(
+                model=self.ai_analyzer.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=messages,
+                **kwargs
+            )
+        except Exception as e:
+            # Modelli/deployment senza JSON mode: si prosegue con il solo prompt
+            if not kwargs or getattr(e, 'status_code', None) != 400 or 'response_format' not in str(e):
+                raise
+            self._json_mode = False
+            self.log("   ⚠️ JSON mode non supportato dal modello, uso il parsing del testo")
+            return self._request_llm(prompt, max_tokens, temperature, system)
+        self._rate_state.update(raw.headers)
+        response = raw.parse()
+        return response.choices[0].message.content
+
+    def list_chunk_files(self, chunks_dir):
         """
-        Carica i chunk dalla cartella chunk (auto-rilevamento formato)
+        Elenca i file chunk con una sola lettura della cartella (auto-rilevamento formato)
 
         Args:
             chunks_dir: Percorso cartella chunk
 
         Returns:
-            list: Lista di dict {chunk_id, text, format}
+            tuple: (formato 'json'/'txt' o None, lista percorsi in ordine numerico)
         """
-        chunks = []
-
-        # Prova formato JSON
-        json_files = sorted(glob(os.path.join(chunks_dir, "chunk_*.json")))
+        json_files = []
+        txt_files = []
+        with os.scandir(chunks_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.startswith('chunk_'):
+                    continue
+                if name.endswith('.json'):
+                    json_files.append((_chunk_number(name[6:-5]), entry.path))
+                elif name.endswith('.txt'):
+                    txt_files.append((_chunk_number(name[6:-4]), entry.path))
+
+        # Il formato JSON ha la precedenza, come in passato
         if json_files:
             self.log(f"📄 Rilevato formato chunk: JSON ({len(json_files)} file)")
-            for json_file in json_files:
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        chunk_id = int(os.path.basename(json_file).replace('chunk_', '').replace('.json', ''))
-                        chunks.append({
+            return 'json', [path for _, path in sorted(json_files)]
+        if txt_files:
+            self.log(f"📄 Rilevato formato chunk: TXT ({len(txt_files)} file)")
+            return 'txt', [path for _, path in sorted(txt_files)]
+        return None, []
+
+    def iter_chunks(self, chunk_format, chunk_files):
+        """
+        Legge i chunk uno alla volta (il testo resta in memoria solo finché serve)
+
+        Args:
+            chunk_format: 'json' o 'txt' (da list_chunk_files)
+            chunk_files: Percorsi dei file chunk
+
+        Yields:
+            dict: {chunk_id, text, format, metadata}
+        """
+        suffix = '.' + chunk_format
+        for chunk_file in chunk_files:
+            try:
+                chunk_id = int(os.path.basename(chunk_file).replace('chunk_', '').replace(suffix, ''))
+                if chunk_format == 'json':
+                    # Lettura in bytes: orjson decodifica direttamente UTF-8
+                    with open(chunk_file, 'rb', buffering=_CHUNK_READ_BUFFER) as f:
+                        data = _json_loads(f.read())
+                    chunk = {
+                        'chunk_id': chunk_id,
+                        'text': data.get('text', ''),
+                        'format': 'json',
+                        'metadata': data
+                    }
+                else:
+                    with open(chunk_file, 'r', encoding='utf-8', buffering=_CHUNK_READ_BUFFER) as f:
+                        chunk = {
                             'chunk_id': chunk_id,
-                            'text': data.get('text', ''),
-                            'format': 'json',
-                            'metadata': data
-                        })
-                except Exception as e:
-                    self.log(f"⚠️ Errore lettura {json_file}: {e}")
-        else:
-            # Prova formato TXT
-            txt_files = sorted(glob(os.path.join(chunks_dir, "chunk_*.txt")))
-            if txt_files:
-                self.log(f"📄 Rilevato formato chunk: TXT ({len(txt_files)} file)")
-                for txt_file in txt_files:
-                    try:
-                        with open(txt_file, 'r', encoding='utf-8') as f:
-                            text = f.read()
-                            chunk_id = int(os.path.basename(txt_file).replace('chunk_', '').replace('.txt', ''))
-                            chunks.append({
-                                'chunk_id': chunk_id,
-                                'text': text,
-                                'format': 'txt',
-                                'metadata': {}
-                            })
-                    except Exception as e:
-                        self.log(f"⚠️ Errore lettura {txt_file}: {e}")
+                            'text': f.read(),
+                            'format': 'txt',
+                            'metadata': {}
+                        }
+            except Exception as e:
+                self.log(f"⚠️ Errore lettura {chunk_file}: {e}")
+                continue
+
+            yield chunk
+
+    def load_chunks(self, chunks_dir):
+        """
+        Carica tutti i chunk dalla cartella chunk (auto-rilevamento formato)
+
+        Args:
+            chunks_dir: Percorso cartella chunk
 
-        return chunks
+        Returns:
+            list: Lista di dict {chunk_id, text, format}
+        """
+        return list(self.iter_chunks(*self.list_chunk_files(chunks_dir)))
 
-    def extract_locations_from_chunks(self, chunks):
+    def extract_locations_from_chunks(self, chunks, total_chunks=None):
         """
         Estrae le posizioni da tutti i chunk usando LLM
 
+        Le chiamate partono in parallelo con concorrenza adattiva (AIMD):
+        +1 richiesta in volo se la latenza media resta sotto obiettivo,
+        dimezzamento su 429/5xx/timeout. La frequenza è regolata dagli header
+        di rate limit del provider; finché non arrivano vale l'intervallo TPM
+        configurato.
+
         Args:
-            chunks: Lista di chunk caricati
+            chunks: Lista o iteratore di chunk (letti man mano che servono)
+            total_chunks: Numero di chunk, obbligatorio se chunks è un iteratore
 
         Returns:
-            list: Lista di posizioni estratte
+            list: Lista di posizioni estratte (nell'ordine dei chunk)
         """
         self.log("\n" + "="*60)
         self.log("🔍 FASE 1: ESTRAZIONE POSIZIONI CON LLM")
         self.log("="*60)
 
-        all_locations = []
-        total_chunks = len(chunks)
+        if total_chunks is None:
+            total_chunks = len(chunks)
+        chunk_iter = iter(chunks)
+        results = []
+        threshold = self.config.get('confidence_threshold', 50)
+
+        # Batch API OpenAI (opzionale): un solo job asincrono invece di richieste in tempo reale
+        if self.config.get('batch_mode') and self.ai_analyzer._get_provider_type() == 'openai':
+            return self._extract_with_batch_api(chunk_iter, threshold)
 
         # Calcola delay intelligente basato su limiti TPM configurati
         rate_limit_delay = self.ai_analyzer._calculate_rate_limit_delay(self.log_callback)
+        limiter = _rate_limiter_for(rate_limit_delay)
 
-        for i, chunk in enumerate(chunks, 1):
-            self.log(f"\n📍 Analisi chunk {i}/{total_chunks} (ID: {chunk['chunk_id']})...")
+        # Modello locale: una richiesta alla volta (una sola GPU/CPU)
+        if self.ai_analyzer._get_provider_type() == 'local':
+            max_conc = 1
+        else:
+            max_conc = _LLM_MAX_CONCURRENCY
+        conc = min(_LLM_START_CONCURRENCY, max_conc)
+        latencies = deque(maxlen=_LLM_LATENCY_WINDOW)
+
+        def extract_one(chunk):
+            # Intervallo TPM stimato solo finché il provider non fornisce header di rate limit
+            if limiter and not self._rate_state.has_headers:
+                limiter.acquire()
+            self._rate_state.wait()
+            started = time.monotonic()
+            locations = self._extract_from_chunk(chunk)
+            return locations, time.monotonic() - started
+
+        done = 0
+        resumed = 0
+        exhausted = False
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=max_conc) as executor:
+            while not exhausted or in_flight:
+                # Riempie fino al livello di concorrenza corrente (chunk letti solo ora)
+                while not exhausted and len(in_flight) < conc:
+                    chunk = next(chunk_iter, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+
+                    # Chunk già elaborato prima di un'interruzione: risultato dal checkpoint
+                    if self._checkpoint and chunk['chunk_id'] in self._checkpoint.completed:
+                        locations = self._checkpoint.completed[chunk['chunk_id']]
+                        results.append([loc for loc in locations if loc['confidence_score'] >= threshold])
+                        done += 1
+                        resumed += 1
+                        continue
+
+                    # Resta in memoria solo l'ID: il testo vive finché la richiesta è in corso
+                    future = executor.submit(extract_one, chunk)
+                    in_flight[future] = (len(results), chunk['chunk_id'])
+                    results.append(None)
+                    del chunk
+
+                if not in_flight:
+                    break
 
-            # Costruisci prompt per LLM
-            prompt = self._build_extraction_prompt(
-                chunk['text'],
-                self.config.get('context_deduction', False)
-            )
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, chunk_id = in_flight.pop(future)
+                    done += 1
+                    self.log(f"\n📍 Chunk {done}/{total_chunks} analizzato (ID: {chunk_id})")
 
-            try:
-                # Chiamata LLM
-                response = self._call_llm(
-                    prompt=prompt,
-                    max_tokens=4000,
-                    temperature=0.3  # Bassa temperatura per output strutturato
-                )
+                    try:
+                        locations, latency = future.result()
+                    except Exception as e:
+                        self.log(f"   ✗ Errore analisi chunk {chunk_id}: {str(e)}")
+                        if _is_backpressure_error(e) and conc > 1:
+                            conc = max(1, conc // 2)
+                            self.log(f"   🔽 Limite del provider: richieste parallele ridotte a {conc}")
+                    else:
+                        if self._checkpoint:
+                            self._checkpoint.add(chunk_id, locations)
+                        filtered = [loc for loc in locations if loc['confidence_score'] >= threshold]
+                        results[index] = filtered
+
+                        self.log(f"   ✓ Trovate {len(locations)} posizioni")
+                        if len(filtered) < len(locations):
+                            self.log(f"   🔽 Filtrate {len(locations) - len(filtered)} posizioni sotto soglia {threshold}%")
+                        self.log(f"   ✅ Posizioni valide: {len(filtered)}")
+
+                        latencies.append(latency)
+                        average = sum(latencies) / len(latencies)
+                        if conc < max_conc and average <= _LLM_TARGET_LATENCY:
+                            conc += 1
+
+                    # Aggiorna progress
+                    progress = int((min(done, total_chunks) / max(total_chunks, 1)) * 50)  # Prima metà progress (0-50%)
+                    self.update_progress(progress)
+
+        self.chunks_processed = done
+        if resumed:
+            self.log(f"\n♻️ {resumed} chunk ripresi dal checkpoint senza nuove chiamate LLM")
+
+        all_locations = [loc for chunk_locations in results if chunk_locations for loc in chunk_locations]
+        self.log(f"\n📊 Totale posizioni estratte: {len(all_locations)}")
+        return all_locations
 
-                # Parsing JSON response
-                locations = self._parse_llm_response(response, chunk['chunk_id'])
+    def _extract_with_batch_api(self, chunk_iter, threshold):
+        """
+        Estrae le posizioni con la Batch API OpenAI (costo dimezzato, nessun limite RPM)
 
-                # Filtra per confidence threshold
-                threshold = self.config.get('confidence_threshold', 50)
-                filtered = [loc for loc in locations if loc['confidence_score'] >= threshold]
+        I chunk vengono scritti in un file JSONL caricato come job batch;
+        il job viene interrogato ogni _BATCH_POLL_INTERVAL secondi fino al
+        termine (al massimo 24 ore) e le risposte riassociate ai chunk.
 
-                self.log(f"   ✓ Trovate {len(locations)} posizioni")
-                if len(filtered) < len(locations):
-                    self.log(f"   🔽 Filtrate {len(locations) - len(filtered)} posizioni sotto soglia {threshold}%")
-                self.log(f"   ✅ Posizioni valide: {len(filtered)}")
+        Args:
+            chunk_iter: Iteratore dei chunk
+            threshold: Soglia minima di confidence
 
-                all_locations.extend(filtered)
+        Returns:
+            list: Lista di posizioni estratte (nell'ordine dei chunk)
+        """
+        client = self.ai_analyzer.client.with_options(timeout=_LLM_TIMEOUT)
+        context_deduction = self.config.get('context_deduction', False)
+        chunk_ids = []
+        results = []
+
+        # File JSONL delle richieste (una riga per chunk, testo non tenuto in memoria)
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8', delete=False) as f:
+            input_path = f.name
+            for chunk in chunk_iter:
+                chunk_ids.append(chunk['chunk_id'])
+
+                # Chunk già elaborato prima di un'interruzione: non va nel batch
+                if self._checkpoint and chunk['chunk_id'] in self._checkpoint.completed:
+                    locations = self._checkpoint.completed[chunk['chunk_id']]
+                    results.append([loc for loc in locations if loc['confidence_score'] >= threshold])
+                    continue
+                results.append(None)
+
+                system, prompt = self._build_extraction_prompt(chunk['text'], context_deduction)
+                body = {
+                    "model": self.ai_analyzer.model,
+                    "max_tokens": _response_max_tokens(chunk['text']),
+                    "temperature": 0.3,
+                    "messages": [
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": prompt}
+                    ]
+                }
+                if self._json_mode:
+                    body["response_format"] = {"type": "json_object"}
+                f.write(json.dumps({
+                    "custom_id": str(len(chunk_ids) - 1),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": body
+                }, ensure_ascii=False) + '\n')
+
+        requests_count = results.count(None)
+        if requests_count < len(chunk_ids):
+            self.log(f"♻️ {len(chunk_ids) - requests_count} chunk ripresi dal checkpoint")
+        if not requests_count:
+            os.remove(input_path)
+            return self._collect_batch_results(chunk_ids, results)
 
-            except Exception as e:
-                self.log(f"   ✗ Errore analisi chunk {chunk['chunk_id']}: {str(e)}")
+        try:
+            self.log(f"📤 Caricamento di {requests_count} richieste sulla Batch API OpenAI...")
+            with open(input_path, 'rb') as f:
+                input_file = client.files.create(file=f, purpose='batch')
+        finally:
+            os.remove(input_path)
+
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        self.log(f"⏳ Batch {batch.id} creato: attesa completamento (fino a 24 ore)...")
+
+        # Polling dello stato (la progress bar segue le richieste elaborate)
+        last_done = -1
+        while batch.status not in _BATCH_FINAL_STATUSES:
+            time.sleep(_BATCH_POLL_INTERVAL)
+            batch = client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            done = (counts.completed + counts.failed) if counts else 0
+            if done != last_done:
+                last_done = done
+                self.log(f"   ⏳ Batch {batch.status}: {done}/{requests_count} richieste elaborate")
+                self.update_progress(int(done / requests_count * 50))
+
+        if not batch.output_file_id:
+            raise Exception(f"Batch {batch.id} terminato con stato '{batch.status}' senza risultati")
+        if batch.status != 'completed':
+            self.log(f"   ⚠️ Batch terminato con stato '{batch.status}': uso i risultati parziali")
+
+        # Risposte in ordine arbitrario: custom_id = posizione del chunk
+        output = client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = _json_loads(line)
+            index = int(item['custom_id'])
+            chunk_id = chunk_ids[index]
+            response = item.get('response') or {}
+            if item.get('error') or response.get('status_code') != 200:
+                error = item.get('error') or response.get('body', {}).get('error')
+                self.log(f"   ✗ Errore analisi chunk {chunk_id}: {error}")
+                continue
+
+            content = response['body']['choices'][0]['message']['content']
+            locations = self._parse_llm_response(content, chunk_id)
+            if self._checkpoint:
+                self._checkpoint.add(chunk_id, locations)
+            results[index] = [loc for loc in locations if loc['confidence_score'] >= threshold]
+
+        missing = results.count(None)
+        if missing:
+            self.log(f"   ⚠️ {missing} chunk senza risposta valida dal batch")
+
+        return self._collect_batch_results(chunk_ids, results)
+
+    def _collect_batch_results(self, chunk_ids, results):
+        """Unisce le posizioni dei chunk del batch (nell'ordine dei chunk)"""
+        self.chunks_processed = len(chunk_ids)
+        self.update_progress(50)
+
+        all_locations = [loc for chunk_locations in results if chunk_locations for loc in chunk_locations]
+        self.log(f"\n📊 Totale posizioni estratte: {len(all_locations)}")
+        return all_locations
 
-            # Aggiorna progress
-            progress = int((i / total_chunks) * 50)  # Prima metà progress (0-50%)
-            self.update_progress(progress)
+    def _extract_from_chunk(self, chunk):
+        """
+        Estrae le posizioni da un singolo chunk (eseguito nei thread del pool)
 
-            # Rate limiting: attendi tra una chiamata e l'altra (eccetto l'ultima)
-            if i < total_chunks:
-                self.log(f"   ⏳ Attesa {rate_limit_delay:.1f}s (rate limiting TPM)...")
-                time.sleep(rate_limit_delay)
+        Args:
+            chunk: Chunk caricato
 
-        self.log(f"\n📊 Totale posizioni estratte: {len(all_locations)}")
-        return all_locations
+        Returns:
+            list: Posizioni trovate dall'LLM (non ancora filtrate per confidence)
+        """
+        # Costruisci prompt per LLM
+        system, prompt = self._build_extraction_prompt(
+            chunk['text'],
+            self.config.get('context_deduction', False)
+        )
+
+        # Chiamata LLM (risposta proporzionata alla lunghezza del chunk)
+        response = self._call_llm(
+            prompt=prompt,
+            max_tokens=_response_max_tokens(chunk['text']),
+            temperature=0.3,  # Bassa temperatura per output strutturato
+            system=system
+        )
+
+        # Parsing JSON response
+        return self._parse_llm_response(response, chunk['chunk_id'])
 
     def _build_extraction_prompt(self, text, context_deduction):
         """
@@ -225,89 +926,43 @@ class LocationAnalyzer:
             context_deduction: Se True, attiva deduzione dal contesto
 
         Returns:
-            str: Prompt strutturato
-        """
-        base_prompt = f"""Analizza il seguente testo e identifica TUTTE le posizioni geografiche menzionate.
-
-Per ogni posizione trovata, estrai:
-- location_text: Il testo esatto che descrive la posizione (es: "Via Roma 10, Milano")
-- location_type: Tipo di posizione tra 'coordinates', 'address', 'place_name', 'poi'
-- sender: Chi ha menzionato la posizione (nome mittente se disponibile, altrimenti "Unknown")
-- timestamp: Data/ora del messaggio (formato come appare nel testo, altrimenti null)
-- message_context: La frase completa o il contesto in cui appare la posizione (max 200 caratteri)
-- confidence_score: Punteggio 0-100 che indica quanto sei sicuro che sia una posizione reale
-
-Tipi di posizioni:
-- coordinates: Coordinate GPS esplicite (es: "45.464204, 9.189982")
-- address: Indirizzi completi (es: "Via Dante 15, Firenze")
-- place_name: Nomi di luoghi (es: "Milano", "Piazza Duomo")
-- poi: Punti di interesse (es: "bar centrale", "stazione", "centro commerciale")
-
-Confidence score:
-- 80-100: Posizione esplicita e chiara (coordinate, indirizzi completi)
-- 50-79: Luogo nominato in modo chiaro (città, vie, piazze)
-- 20-49: Riferimento generico o ambiguo (es: "al bar", "in centro")
-- 0-19: Possibile falso positivo (nomi propri, metafore)
-"""
-
-        if context_deduction:
-            base_prompt += """
-DEDUZIONE DAL CONTESTO ATTIVA:
-Cerca anche di dedurre posizioni implicite:
-- "torno a casa" → cerca l'indirizzo di casa nei messaggi precedenti
-- "ci vediamo al solito posto" → cerca luoghi già menzionati
-- Riferimenti indiretti a luoghi già discussi
-
-Per deduzioni, usa confidence_score più basso (30-60) e aggiungi nota nel message_context.
-"""
-
-        base_prompt += f"""
-Restituisci SOLO un JSON valido nel seguente formato:
-{{
-  "locations": [
-    {{
-      "location_text": "string",
-      "location_type": "coordinates|address|place_name|poi",
-      "sender": "string",
-      "timestamp": "string or null",
-      "message_context": "string",
-      "confidence_score": 0-100
-    }}
-  ]
-}}
-
-TESTO DA ANALIZZARE:
-{text}
-
-JSON OUTPUT:"""
-
-        return base_prompt
+            tuple: (istruzioni di sistema, messaggio utente con il solo testo)
+        """
+        system = _SYSTEM_PROMPT_CONTEXT if context_deduction else _SYSTEM_PROMPT
+        return system, text + _PROMPT_SUFFIX
 
     def _parse_llm_response(self, response, chunk_id):
         """
         Parsing della risposta LLM in JSON
 
         Args:
-            response: Risposta testuale dall'LLM
+            response: Risposta dall'LLM (testo JSON o dict del tool use)
             chunk_id: ID del chunk analizzato
 
         Returns:
             list: Lista di posizioni estratte
         """
-        try:
-            # Prova parsing diretto
-            data = json.loads(response)
-        except json.JSONDecodeError:
-            # Fallback: cerca JSON tra { e }
-            start = response.find('{')
-            end = response.rfind('}') + 1
-            if start != -1 and end > start:
+        if isinstance(response, dict):
+            # Output strutturato (tool use Anthropic): nessun parsing necessario
+            data = response
+        else:
+            try:
+                # JSON mode (OpenAI/Ollama): parsing diretto
+                # (orjson.JSONDecodeError deriva da json.JSONDecodeError)
+                data = _json_loads(response)
+            except json.JSONDecodeError:
+                # Fallback per modelli senza JSON mode: cerca JSON tra { e }
+                # (json standard, più tollerante di orjson)
+                match = _RE_JSON_OBJECT.search(response)
+                if not match:
+                    return []
                 try:
-                    data = json.loads(response[start:end])
+                    data = json.loads(match.group(0))
                 except:
                     return []
-            else:
-                return []
+
+        if not isinstance(data, dict):
+            return []
 
         locations = []
         for loc in data.get('locations', []):
@@ -343,54 +998,306 @@ JSON OUTPUT:"""
         provider = self.config.get('geocoding_provider', 'nominatim')
         self.log(f"🔧 Provider: {provider.upper()}")
 
+        all_locations = locations
+        self._geocoded_count = 0
+
+        # Una sola richiesta per ogni testo normalizzato (memoizzazione nella stessa analisi);
+        # con la deduplicazione attiva anche le coordinate vicine entro epsilon_m
+        dedup = self.config.get('dedup') or {}
+        epsilon_m = (dedup.get('epsilon_m') or 1.0) if dedup.get('enabled') else None
+        groups = self._group_duplicates(locations, epsilon_m, fuzzy=bool(dedup.get('enabled')))
+        locations = [group[0] for group in groups]
+        weights = {id(group[0]): len(group) for group in groups}
+        if len(locations) < len(all_locations):
+            self.log(f"🧹 Deduplicazione: {len(all_locations)} posizioni → {len(locations)} da geocodificare")
+
+        # Coordinate esplicite: lette dal testo, nessuna richiesta al provider
+        remaining = []
+        for location in locations:
+            coordinates = _parse_coordinates(location)
+            if coordinates:
+                location['lat'], location['lon'] = coordinates
+                location['geocoded'] = True
+                self._geocoded_count += 1
+            else:
+                remaining.append(location)
+        if len(remaining) < len(locations):
+            self.log(f"📌 {len(locations) - len(remaining)} coordinate esplicite lette dal testo (senza geocoding)")
+        locations = remaining
+
         total = len(locations)
-        geocoded_count = 0
 
-        for i, location in enumerate(locations, 1):
-            self.log(f"\n📍 Geocoding {i}/{total}: {location['location_text'][:50]}...")
+        # Intervallo tra richieste: da dialog (throttle_ms) o predefinito (1.5s Nominatim, 0.5s Google)
+        if self.config.get('throttle_ms') is not None:
+            delay = self.config['throttle_ms'] / 1000
+        else:
+            delay = 1.5 if provider == "nominatim" else 0.5
 
+        # Cache su disco dei risultati (se abilitata nel dialog)
+        cache = None
+        if self.config.get('geocode_cache') and self.config.get('cache_path'):
             try:
-                if provider == "nominatim":
-                    lat, lon = self._geocode_nominatim(location['location_text'])
-                else:  # google
-                    lat, lon = self._geocode_google(location['location_text'])
-
-                if lat and lon:
-                    location['lat'] = lat
-                    location['lon'] = lon
+                cache = GeocodeCache(self.config['cache_path'])
+            except Exception as e:
+                self.log(f"⚠️ Cache geocoding non disponibile: {e}")
+
+        try:
+            if provider == "google" and total:
+                batch_size = max(1, int(self.config.get('batch_size') or 1))
+
+                workers = min(batch_size, _GOOGLE_MAX_WORKERS)
+
+                if self.config.get('hybrid_mode'):
+                    head, tail = self._split_hybrid(locations, self.config.get('google_budget') or 0, weights)
+                    self.log(f"🔀 Modalità ibrida: {len(head)} posizioni a Google, {len(tail)} a Nominatim")
+                    self._geocode_concurrent(head, "google", delay, cache, workers, batch_size, total=total)
+                    self._geocode_concurrent(tail, "nominatim", max(delay, _NOMINATIM_MIN_DELAY), cache,
+                                             start=len(head), total=total)
+                else:
+                    self._geocode_concurrent(locations, "google", delay, cache, workers, batch_size)
+            else:
+                self._geocode_concurrent(locations, provider, delay, cache)
+        finally:
+            if cache:
+                cache.close()
+
+        self._propagate_duplicates(groups)
+
+        self.log(f"\n📊 Geocoding completato: {self._geocoded_count}/{len(all_locations)} posizioni")
+        if self.geocoding_errors:
+            self.log(f"⚠️ {len(self.geocoding_errors)} posizioni non geocodificate")
+
+        return all_locations
+
+    def _group_duplicates(self, locations, epsilon_m=None, fuzzy=False):
+        """
+        Raggruppa le posizioni identiche prima del geocoding
+
+        I testi sono confrontati normalizzati; se epsilon_m è indicato, le
+        coordinate esplicite finiscono nella stessa cella di una griglia di
+        lato epsilon_m metri. Con fuzzy (e rapidfuzz installato) si uniscono
+        anche le varianti con similarità >= _FUZZY_MIN_SCORE, purché
+        contengano gli stessi numeri (civici e CAP diversi restano separati).
+
+        Args:
+            locations: Posizioni estratte
+            epsilon_m: Tolleranza in metri per le coordinate (None = solo testo)
+            fuzzy: Unisce le varianti quasi identiche dei testi
+
+        Returns:
+            list: Gruppi (liste) di posizioni, nell'ordine di prima comparsa
+        """
+        delta = epsilon_m / _METERS_PER_DEGREE if epsilon_m else None
+        groups = {}
+
+        # Testi già visti, per sequenza di numeri (i confronti restano tra candidati compatibili)
+        fuzzy_keys = defaultdict(list) if fuzzy and RAPIDFUZZ_AVAILABLE else None
+
+        for location in locations:
+            key = None
+            if delta and location.get('location_type') == 'coordinates':
+                match = _RE_COORDINATES.match(location['location_text'])
+                if match:
+                    lat, lon = float(match.group(1)), float(match.group(2))
+                    key = ('grid', round(lat / delta), round(lon / delta))
+            if key is None:
+                key = normalize_address(location['location_text'])
+                if fuzzy_keys is not None and key not in groups:
+                    candidates = fuzzy_keys[tuple(_RE_DIGITS.findall(key))]
+                    best = fuzz_process.extractOne(
+                        key, candidates, scorer=fuzz.token_sort_ratio, score_cutoff=_FUZZY_MIN_SCORE
+                    )
+                    if best:
+                        key = best[0]
+                    else:
+                        candidates.append(key)
+
+            groups.setdefault(key, []).append(location)
+
+        return list(groups.values())
+
+    def _propagate_duplicates(self, groups):
+        """Copia il risultato del rappresentante geocodificato sui duplicati del gruppo"""
+        for group in groups:
+            ref = group[0]
+            for location in group[1:]:
+                if ref['geocoded']:
+                    location['lat'] = ref['lat']
+                    location['lon'] = ref['lon']
                     location['geocoded'] = True
-                    geocoded_count += 1
-                    self.log(f"   ✓ Coordinate: {lat:.6f}, {lon:.6f}")
+                    self._geocoded_count += 1
                 else:
-                    self.log(f"   ✗ Posizione non trovata")
                     self.geocoding_errors.append({
                         'location_text': location['location_text'],
                         'chunk_id': location['chunk_id'],
-                        'reason': 'Location not found by geocoding service'
+                        'reason': 'Duplicate of a location not found by geocoding service'
                     })
 
-            except Exception as e:
-                self.log(f"   ✗ Errore: {str(e)}")
-                self.geocoding_errors.append({
-                    'location_text': location['location_text'],
-                    'chunk_id': location['chunk_id'],
-                    'reason': str(e)
-                })
+    def _split_hybrid(self, locations, budget, weights=None):
+        """
+        Divide le posizioni tra Google e Nominatim per la modalità ibrida
 
-            # Rate limiting (1.5 sec per Nominatim, 0.5 per Google)
-            delay = 1.5 if provider == "nominatim" else 0.5
-            if i < total:  # Non aspettare dopo l'ultimo
-                time.sleep(delay)
+        I luoghi più frequenti vanno a Google finché le richieste necessarie
+        restano entro il budget; la coda va a Nominatim.
 
-            # Aggiorna progress (50-100%)
-            progress = 50 + int((i / total) * 50)
-            self.update_progress(progress)
+        Args:
+            locations: Posizioni da geocodificare
+            budget: Numero massimo di richieste Google
+            weights: Occorrenze per posizione (id -> conteggio) se già deduplicate
 
-        self.log(f"\n📊 Geocoding completato: {geocoded_count}/{total} posizioni")
-        if self.geocoding_errors:
-            self.log(f"⚠️ {len(self.geocoding_errors)} posizioni non geocodificate")
+        Returns:
+            tuple: (posizioni per Google, posizioni per Nominatim)
+        """
+        weights = weights or {}
+        groups = {}
+        for location in locations:
+            groups.setdefault(normalize_address(location['location_text']), []).append(location)
+
+        head, tail = [], []
+        used = 0
+        def frequency(group):
+            return sum(weights.get(id(location), 1) for location in group)
+
+        for group in sorted(groups.values(), key=frequency, reverse=True):
+            if used + len(group) <= budget:
+                head.extend(group)
+                used += len(group)
+            else:
+                tail.extend(group)
 
-        return locations
+        return head, tail
+
+    def _geocode_concurrent(self, locations, provider, delay, cache, workers=1, batch_size=None,
+                            start=0, total=None):
+        """
+        Geocodifica le posizioni con un pool di thread limitato da un RateLimiter
+
+        La cache è consultata prima dell'invio (solo le mancanti vanno in rete);
+        log, progress e scritture in cache restano nel thread chiamante.
+        L'API Geocoding di Google non ha un endpoint batch: batch_size limita
+        soltanto le richieste in coda/in volo, rabboccate man mano che
+        terminano (nessuna attesa a fine blocco).
+
+        Args:
+            locations: Posizioni da geocodificare
+            provider: 'nominatim' o 'google'
+            delay: Intervallo minimo tra richieste in secondi
+            cache: GeocodeCache o None
+            workers: Thread del pool (1 per Nominatim)
+            batch_size: Massimo di richieste in coda/in volo (None = tutte)
+            start: Posizioni già elaborate (per i messaggi di progresso)
+            total: Totale complessivo (per i messaggi di progresso)
+        """
+        count = len(locations)
+        total = total or count
+        batch_size = batch_size or count or 1
+        limiter = _rate_limiter_for(delay)
+        done = start
+        pending = iter(locations)
+        exhausted = False
+        futures = {}
+
+        def request(location_text):
+            # Ogni tentativo passa dal limiter: anche i retry rispettano l'intervallo
+            if limiter:
+                limiter.acquire()
+            return self._geocode_with_provider(provider, location_text)
+
+        def geocode_one(location_text):
+            return self._with_retries(request, location_text, rate_state=self._geocode_rate_state)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while not exhausted or futures:
+                # Rabbocca la coda fino a batch_size richieste (le posizioni in cache non vanno in rete)
+                while not exhausted and len(futures) < batch_size:
+                    location = next(pending, None)
+                    if location is None:
+                        exhausted = True
+                        break
+
+                    cache_key, cached = self._cache_lookup(cache, provider, location, log=False)
+                    if cached:
+                        done += 1
+                        self.log(f"\n📍 Geocoding {done}/{total}: {location['location_text'][:50]}...")
+                        self.log("   💾 Risultato da cache")
+                        self._apply_geocode_result(location, cached[0], cached[1], cache, cache_key, True)
+                        self.update_progress(50 + int((done / total) * 50))
+                    else:
+                        future = executor.submit(geocode_one, location['location_text'])
+                        futures[future] = (location, cache_key)
+
+                if not futures:
+                    break
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    location, cache_key = futures.pop(future)
+                    done += 1
+                    self.log(f"\n📍 Geocoding {done}/{total}: {location['location_text'][:50]}...")
+                    try:
+                        lat, lon = future.result()
+                        self._apply_geocode_result(location, lat, lon, cache, cache_key, False)
+                    except Exception as e:
+                        self._record_geocode_error(location, e)
+
+                    # Aggiorna progress (50-100%)
+                    self.update_progress(50 + int((done / total) * 50))
+
+    def _geocode_with_provider(self, provider, location_text):
+        """Richiesta di geocoding al provider indicato"""
+        if provider == "nominatim":
+            return self._geocode_nominatim(location_text)
+        return self._geocode_google(location_text)
+
+    def _cache_lookup(self, cache, provider, location, log=True):
+        """
+        Cerca la posizione nella cache su disco
+
+        Returns:
+            tuple: (chiave cache o None, (lat, lon) o None);
+                   (None, None) come risultato per le posizioni già non trovate
+        """
+        if not cache:
+            return None, None
+
+        cache_key = f"{provider}:{normalize_address(location['location_text'])}"
+        hit = cache.get(cache_key)
+        if not hit:
+            return cache_key, None
+
+        if log:
+            self.log("   💾 Risultato da cache")
+        return cache_key, (hit[0], hit[1])
+
+    def _apply_geocode_result(self, location, lat, lon, cache, cache_key, cached):
+        """Assegna le coordinate alla posizione (o registra il mancato ritrovamento)"""
+        # Salva anche i "non trovato" (scadono prima); gli errori di rete no
+        found = bool(lat and lon)
+        if cache and not cached:
+            cache.set(cache_key, lat if found else None, lon if found else None)
+
+        if found:
+            location['lat'] = lat
+            location['lon'] = lon
+            location['geocoded'] = True
+            self._geocoded_count += 1
+            self.log(f"   ✓ Coordinate: {lat:.6f}, {lon:.6f}")
+        else:
+            self.log(f"   ✗ Posizione non trovata")
+            self.geocoding_errors.append({
+                'location_text': location['location_text'],
+                'chunk_id': location['chunk_id'],
+                'reason': 'Location not found by geocoding service'
+            })
+
+    def _record_geocode_error(self, location, error):
+        """Registra un errore di geocoding per la posizione"""
+        self.log(f"   ✗ Errore: {str(error)}")
+        self.geocoding_errors.append({
+            'location_text': location['location_text'],
+            'chunk_id': location['chunk_id'],
+            'reason': str(error)
+        })
 
     def _geocode_nominatim(self, location_text):
         """
@@ -408,11 +1315,9 @@ JSON OUTPUT:"""
             'format': 'json',
             'limit': 1
         }
-        headers = {
-            'User-Agent': 'WhatsAppForensicAnalyzer/3.4.0'
-        }
 
-        response = requests.get(base_url, params=params, headers=headers, timeout=10)
+        # User-Agent con contatto impostato sulla sessione (richiesto da Nominatim)
+        response = self.http.get(base_url, params=params, timeout=_GEOCODE_TIMEOUT)
         response.raise_for_status()
 
         data = response.json()
@@ -430,6 +1335,10 @@ JSON OUTPUT:"""
 
         Returns:
             tuple: (lat, lon) o (None, None) se non trovato
+
+        Raises:
+            GeocodingRateLimitError: Quota esaurita (ritentata da _with_retries)
+            ValueError: API key mancante o altro status di errore di Google
         """
         api_key = self.config.get('google_api_key')
         if not api_key:
@@ -441,11 +1350,19 @@ JSON OUTPUT:"""
             'key': api_key
         }
 
-        response = requests.get(base_url, params=params, timeout=10)
+        response = self.http.get(base_url, params=params, timeout=_GEOCODE_TIMEOUT)
         response.raise_for_status()
 
         data = response.json()
-        if data['status'] == 'OK' and len(data['results']) > 0:
+
+        # Gli errori arrivano con HTTP 200: sollevati per non finire in cache come "non trovato"
+        status = data.get('status')
+        if status == _GOOGLE_QUOTA_STATUS:
+            raise GeocodingRateLimitError(f"Google Geocoding: {status}")
+        if status not in _GOOGLE_RESULT_STATUSES:
+            raise ValueError(f"Google Geocoding: {status} {data.get('error_message', '')}".strip())
+
+        if status == 'OK' and len(data['results']) > 0:
             location = data['results'][0]['geometry']['location']
             return location['lat'], location['lng']
 
@@ -476,28 +1393,53 @@ JSON OUTPUT:"""
         tolerance = 0.001  # Circa 100 metri
         groups = []
 
-        for loc in geocoded:
-            found_group = False
-            for group in groups:
-                # Controlla se coordinate simili
-                ref = group[0]
-                if (abs(loc['lat'] - ref['lat']) < tolerance and
-                    abs(loc['lon'] - ref['lon']) < tolerance):
-                    group.append(loc)
-                    found_group = True
-                    break
-
-            if not found_group:
+        # Coordinate in colonne (structure of arrays): lette una sola volta dai dict
+        lats = [loc['lat'] for loc in geocoded]
+        lons = [loc['lon'] for loc in geocoded]
+        if NUMPY_AVAILABLE:
+            cell_lats = np.floor(np.array(lats) / tolerance).astype(np.int64).tolist()
+            cell_lons = np.floor(np.array(lons) / tolerance).astype(np.int64).tolist()
+        else:
+            cell_lats = [math.floor(lat / tolerance) for lat in lats]
+            cell_lons = [math.floor(lon / tolerance) for lon in lons]
+
+        # Griglia di lato `tolerance`: ogni gruppo è indicizzato nella cella del suo
+        # riferimento, quindi basta controllare la cella della posizione e le 8 vicine
+        buckets = defaultdict(list)
+        ref_lats, ref_lons = [], []  # Coordinate del riferimento di ogni gruppo
+        group_ids = []  # Gruppo di ogni posizione, nell'ordine di `geocoded`
+
+        for loc, lat, lon, cell_lat, cell_lon in zip(geocoded, lats, lons, cell_lats, cell_lons):
+            # Primo gruppo compatibile in ordine di creazione (come la scansione lineare)
+            match = None
+            for d_lat in (-1, 0, 1):
+                for d_lon in (-1, 0, 1):
+                    for index in buckets.get((cell_lat + d_lat, cell_lon + d_lon), ()):
+                        if (abs(lat - ref_lats[index]) < tolerance and
+                                abs(lon - ref_lons[index]) < tolerance and
+                                (match is None or index < match)):
+                            match = index
+
+            if match is not None:
+                groups[match].append(loc)
+                group_ids.append(match)
+            else:
+                buckets[(cell_lat, cell_lon)].append(len(groups))
+                group_ids.append(len(groups))
                 groups.append([loc])
+                ref_lats.append(lat)
+                ref_lons.append(lon)
 
         self.log(f"🎯 Gruppi di posizioni simili: {len(groups)}")
 
+        # Coordinate medie per gruppo
+        avg_lats, avg_lons = self._group_centroids(lats, lons, group_ids, len(groups))
+
         # Crea posizioni unificate
         unified_locations = []
         for i, group in enumerate(groups, 1):
-            # Calcola coordinate medie
-            avg_lat = sum(loc['lat'] for loc in group) / len(group)
-            avg_lon = sum(loc['lon'] for loc in group) / len(group)
+            avg_lat = avg_lats[i - 1]
+            avg_lon = avg_lons[i - 1]
 
             # Usa il nome più comune/dettagliato
             location_names = [loc['location_text'] for loc in group]
@@ -533,6 +1475,36 @@ JSON OUTPUT:"""
 
         return unified_locations
 
+    def _group_centroids(self, lats, lons, group_ids, group_count):
+        """
+        Calcola le coordinate medie di ogni gruppo
+
+        Con NumPy una sola passata (bincount pesato) sulle colonne delle
+        coordinate, altrimenti somme accumulate per gruppo.
+
+        Returns:
+            tuple: (lista lat medie, lista lon medie) nell'ordine dei gruppi
+        """
+        if NUMPY_AVAILABLE:
+            gid = np.array(group_ids, dtype=np.intp)
+            counts = np.bincount(gid, minlength=group_count)
+            return (
+                (np.bincount(gid, weights=np.array(lats), minlength=group_count) / counts).tolist(),
+                (np.bincount(gid, weights=np.array(lons), minlength=group_count) / counts).tolist()
+            )
+
+        sum_lats = [0.0] * group_count
+        sum_lons = [0.0] * group_count
+        counts = [0] * group_count
+        for gid, lat, lon in zip(group_ids, lats, lons):
+            sum_lats[gid] += lat
+            sum_lons[gid] += lon
+            counts[gid] += 1
+        return (
+            [total / count for total, count in zip(sum_lats, counts)],
+            [total / count for total, count in zip(sum_lons, counts)]
+        )
+
     def analyze(self):
         """
         Esegue l'analisi completa delle posizioni
@@ -543,27 +1515,34 @@ JSON OUTPUT:"""
         try:
             # Fase 1: Carica chunk
             self.log("📂 Caricamento chunk...")
-            chunks = self.load_chunks(self.config['chunks_dir'])
-            if not chunks:
+            chunk_format, chunk_files = self.list_chunk_files(self.config['chunks_dir'])
+            if not chunk_files:
                 raise ValueError("Nessun chunk trovato")
 
             # Se modalità test attiva, limita i chunk
-            original_total = len(chunks)
+            original_total = len(chunk_files)
             if self.config.get('test_mode', False):
                 max_chunks = self.config.get('test_chunks', 5)
-                chunks = chunks[:max_chunks]
-                self.log(f"🧪 MODALITÀ TEST ATTIVA: Analisi limitata ai primi {len(chunks)} chunk (su {original_total} totali)")
+                chunk_files = chunk_files[:max_chunks]
+                self.log(f"🧪 MODALITÀ TEST ATTIVA: Analisi limitata ai primi {len(chunk_files)} chunk (su {original_total} totali)")
                 self.log(f"   ⚠️ Questa è un'analisi preliminare per verificare l'estrazione posizioni")
 
-            # Fase 2: Estrai posizioni con LLM
-            raw_locations = self.extract_locations_from_chunks(chunks)
+            # Checkpoint: un'analisi interrotta riprende dai chunk già salvati
+            self._checkpoint = self._open_checkpoint()
+
+            # Fase 2: Estrai posizioni con LLM (chunk letti dal disco man mano)
+            raw_locations = self.extract_locations_from_chunks(
+                self.iter_chunks(chunk_format, chunk_files),
+                total_chunks=len(chunk_files)
+            )
             if not raw_locations:
                 self.log("\n⚠️ Nessuna posizione trovata nel documento")
+                self._discard_checkpoint()
                 return {
                     'locations': [],
                     'geocoding_errors': [],
                     'stats': {
-                        'total_chunks': len(chunks),
+                        'total_chunks': self.chunks_processed,
                         'locations_found': 0,
                         'locations_geocoded': 0,
                         'unique_locations': 0,
@@ -579,7 +1558,7 @@ JSON OUTPUT:"""
 
             # Statistiche
             stats = {
-                'total_chunks': len(chunks),
+                'total_chunks': self.chunks_processed,
                 'locations_found': len(raw_locations),
                 'locations_geocoded': len([l for l in geocoded_locations if l['geocoded']]),
                 'unique_locations': len(final_locations),
@@ -603,6 +1582,7 @@ JSON OUTPUT:"""
                 self.log(f"\n   ⚠️ ATTENZIONE: Analisi limitata ai primi {self.config.get('test_chunks', 5)} chunk (su {original_total} totali)")
                 self.log(f"   💡 Per analizzare tutti i chunk, disattiva la modalità test e rilancia")
 
+            self._discard_checkpoint()
             return {
                 'locations': final_locations,
                 'geocoding_errors': self.geocoding_errors,
@@ -612,3 +1592,44 @@ JSON OUTPUT:"""
         except Exception as e:
             self.log(f"\n✗ ERRORE FATALE: {str(e)}")
             raise
+
+        finally:
+            if self._checkpoint:
+                self._checkpoint.close()
+            self.http.close()
+
+    def _open_checkpoint(self):
+        """
+        Apre il checkpoint dell'estrazione nella cartella output
+
+        Il checkpoint è valido solo per la stessa cartella chunk, lo stesso
+        modello e la stessa impostazione di deduzione dal contesto; la soglia
+        di confidence si applica alla ripresa.
+
+        Returns:
+            ExtractionCheckpoint o None se la cartella output non è disponibile
+        """
+        output_dir = self.config.get('output_dir')
+        if not output_dir:
+            return None
+
+        signature = {
+            'chunks_dir': os.path.abspath(self.config['chunks_dir']),
+            'model': self.ai_analyzer.model,
+            'context_deduction': bool(self.config.get('context_deduction', False))
+        }
+        try:
+            checkpoint = ExtractionCheckpoint(os.path.join(output_dir, _CHECKPOINT_FILE), signature)
+        except OSError as e:
+            self.log(f"⚠️ Checkpoint non disponibile: {e}")
+            return None
+
+        if checkpoint.completed:
+            self.log(f"♻️ Ripresa analisi interrotta: {len(checkpoint.completed)} chunk già elaborati")
+        return checkpoint
+
+    def _discard_checkpoint(self):
+        """Elimina il checkpoint ad analisi completata"""
+        if self._checkpoint:
+            self._checkpoint.discard()
+            self._checkpoint = None
@@ -9,117 +9,61 @@ import os
 import json
 from datetime import datetime
 
+# orjson opzionale: serializzazione più veloce di dati e marker (UTF-8 diretto)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_dumps(obj, default=None):
+    """
+    Serializza in JSON compatto (str), con orjson se disponibile
+
+    Args:
+        obj: Oggetto da serializzare
+        default: Conversione degli oggetti non JSON (chiamata dall'encoder)
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+
+
+class _MarkerView:
+    """Posizione da serializzare come marker (il dict ridotto nasce solo nell'encoder)"""
+    __slots__ = ('location',)
+
+    def __init__(self, location):
+        self.location = location
+
+
+def _marker_default(obj):
+    """Rappresentazione JSON di un marker, costruita durante la serializzazione"""
+    if not isinstance(obj, _MarkerView):
+        raise TypeError(f"Oggetto non serializzabile: {type(obj).__name__}")
+
+    loc = obj.location
+    return {
+        'location_id': loc['location_id'],
+        'location_text': loc['location_text'],
+        'lat': loc['lat'],
+        'lon': loc['lon'],
+        'location_type': loc['location_type'],
+        'event_count': loc['event_count'],
+        'events': [{
+            'chunk_id': evt['chunk_id'],
+            'sender': evt['sender'],
+            'timestamp': evt['timestamp'],
+            'message_context': evt['message_context'][:200],  # Limita lunghezza
+            'confidence': evt['confidence_score']
+        } for evt in loc['events']]
+    }
 
-class LocationReportGenerator:
-    def __init__(self, analysis_results, output_dir):
-        """
-        Inizializza il generatore di report
-
-        Args:
-            analysis_results: Risultati dell'analisi (locations, errors, stats)
-            output_dir: Cartella output principale
-        """
-        self.results = analysis_results
-        self.output_dir = output_dir
-        self.report_dir = None
-
-    def generate_report(self):
-        """
-        Genera il report HTML completo
-
-        Returns:
-            str: Percorso del file index.html generato
-        """
-        from dashboard_manager import DashboardManager
-
-        # Crea cartella REPORT/report_posizioni
-        self.report_dir = os.path.join(self.output_dir, "REPORT", "report_posizioni")
-        os.makedirs(self.report_dir, exist_ok=True)
-
-        # Salva dati JSON
-        self._save_json_data()
-
-        # Genera HTML
-        html_path = self._generate_html()
-
-        # Genera CSS
-        self._generate_css()
-
-        # Registra il report nella dashboard
-        dashboard = DashboardManager(self.output_dir)
-        dashboard.register_report('locations', self.results['stats'])
-
-        # Rigenera dashboard
-        dashboard.generate_dashboard()
-
-        return html_path
-
-    def _save_json_data(self):
-        """Salva i dati in formato JSON per eventuale riutilizzo"""
-        json_path = os.path.join(self.report_dir, "locations_data.json")
-
-        data = {
-            'generated_at': datetime.now().isoformat(),
-            'stats': self.results['stats'],
-            'locations': self.results['locations'],
-            'geocoding_errors': self.results['geocoding_errors']
-        }
-
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-    def _calculate_map_center(self):
-        """
-        Calcola il centro della mappa (media coordinate)
-
-        Returns:
-            tuple: (lat, lon, zoom)
-        """
-        locations = self.results['locations']
-        if not locations:
-            return 41.9028, 12.4964, 6  # Roma, Italia (default)
-
-        avg_lat = sum(loc['lat'] for loc in locations) / len(locations)
-        avg_lon = sum(loc['lon'] for loc in locations) / len(locations)
-
-        # Zoom in base a numero posizioni
-        if len(locations) == 1:
-            zoom = 15
-        elif len(locations) <= 5:
-            zoom = 12
-        elif len(locations) <= 20:
-            zoom = 10
-        else:
-            zoom = 8
-
-        return avg_lat, avg_lon, zoom
-
-    def _generate_html(self):
-        """
-        Genera il file HTML principale
-
-        Returns:
-            str: Percorso file generato
-        """
-        from html_templates import create_breadcrumb
-
-        locations = self.results['locations']
-        stats = self.results['stats']
-        errors = self.results['geocoding_errors']
-
-        center_lat, center_lon, zoom = self._calculate_map_center()
-
-        # Genera dati JavaScript per i marker
-        markers_js = self._generate_markers_js()
 
-        # Genera breadcrumb
-        breadcrumb_items = [
-            ('🏠 Dashboard', '../index.html'),
-            ('Posizioni Geografiche', None)
-        ]
-        breadcrumb_html = create_breadcrumb(breadcrumb_items)
-
-        html_content = f"""<!DOCTYPE html>
+# Pagina del report: scheletro HTML e script della mappa costruiti una sola volta,
+# per ogni report si riempiono solo i segnaposto con format_map
+_HTML_PAGE = """<!DOCTYPE html>
 <html lang="it">
 <head>
     <meta charset="UTF-8">
@@ -141,19 +85,19 @@ class LocationReportGenerator:
             <div class="stats-bar">
                 <div class="stat-item">
                     <span class="stat-label">Posizioni Uniche:</span>
-                    <span class="stat-value">{stats['unique_locations']}</span>
+                    <span class="stat-value">{unique_locations}</span>
                 </div>
                 <div class="stat-item">
                     <span class="stat-label">Eventi Totali:</span>
-                    <span class="stat-value">{stats['total_events']}</span>
+                    <span class="stat-value">{total_events}</span>
                 </div>
                 <div class="stat-item">
                     <span class="stat-label">Chunk Analizzati:</span>
-                    <span class="stat-value">{stats['total_chunks']}</span>
+                    <span class="stat-value">{total_chunks}</span>
                 </div>
                 <div class="stat-item">
                     <span class="stat-label">Geocodificate:</span>
-                    <span class="stat-value">{stats['locations_geocoded']}/{stats['locations_found']}</span>
+                    <span class="stat-value">{locations_geocoded}/{locations_found}</span>
                 </div>
             </div>
         </header>
@@ -200,17 +144,17 @@ class LocationReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-                    {self._generate_table_rows()}
+                    {table_rows}
                 </tbody>
             </table>
         </div>
 
         <!-- Sezione Errori Geocoding -->
-        {self._generate_errors_section()}
+        {errors_section}
 
         <!-- Footer -->
         <footer>
-            <p>Report generato il {datetime.now().strftime('%d/%m/%Y alle %H:%M:%S')}</p>
+            <p>Report generato il {generated_at}</p>
             <p>© 2025 Luca Mercatanti - <a href="https://mercatanti.com" target="_blank">mercatanti.com</a></p>
         </footer>
     </div>
@@ -218,7 +162,9 @@ class LocationReportGenerator:
     <!-- Leaflet JS -->
     <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
 
-    <!-- Custom JavaScript -->
+"""
+
+_MAP_SCRIPT = """    <!-- Custom JavaScript -->
     <script>
         // Inizializza mappa
         const map = L.map('map').setView([{center_lat}, {center_lon}], {zoom});
@@ -360,12 +306,146 @@ class LocationReportGenerator:
             window.scrollTo({{ top: 0, behavior: 'smooth' }});
         }}
     </script>
+"""
 
+_HTML_PAGE_END = """
     <!-- Scroll to top button -->
     <button id="scrollTopBtn" onclick="scrollToTop()">↑</button>
 </body>
 </html>"""
 
+_HTML_SHELL = _HTML_PAGE + _MAP_SCRIPT + _HTML_PAGE_END
+
+
+class LocationReportGenerator:
+    def __init__(self, analysis_results, output_dir):
+        """
+        Inizializza il generatore di report
+
+        Args:
+            analysis_results: Risultati dell'analisi (locations, errors, stats)
+            output_dir: Cartella output principale
+        """
+        self.results = analysis_results
+        self.output_dir = output_dir
+        self.report_dir = None
+
+    def generate_report(self):
+        """
+        Genera il report HTML completo
+
+        Returns:
+            str: Percorso del file index.html generato
+        """
+        from dashboard_manager import DashboardManager
+
+        # Crea cartella REPORT/report_posizioni
+        self.report_dir = os.path.join(self.output_dir, "REPORT", "report_posizioni")
+        os.makedirs(self.report_dir, exist_ok=True)
+
+        # Salva dati JSON
+        self._save_json_data()
+
+        # Genera HTML
+        html_path = self._generate_html()
+
+        # Genera CSS
+        self._generate_css()
+
+        # Registra il report nella dashboard
+        dashboard = DashboardManager(self.output_dir)
+        dashboard.register_report('locations', self.results['stats'])
+
+        # Rigenera dashboard
+        dashboard.generate_dashboard()
+
+        return html_path
+
+    def _save_json_data(self):
+        """Salva i dati in formato JSON per eventuale riutilizzo"""
+        json_path = os.path.join(self.report_dir, "locations_data.json")
+
+        data = {
+            'generated_at': datetime.now().isoformat(),
+            'stats': self.results['stats'],
+            'locations': self.results['locations'],
+            'geocoding_errors': self.results['geocoding_errors']
+        }
+
+        if ORJSON_AVAILABLE:
+            with open(json_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            # Codifica completa in memoria e una sola scrittura (json.dump scrive token per token)
+            payload = json.dumps(data, indent=2, ensure_ascii=False)
+            with open(json_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+
+    def _calculate_map_center(self):
+        """
+        Calcola il centro della mappa (media coordinate)
+
+        Returns:
+            tuple: (lat, lon, zoom)
+        """
+        locations = self.results['locations']
+        if not locations:
+            return 41.9028, 12.4964, 6  # Roma, Italia (default)
+
+        avg_lat = sum(loc['lat'] for loc in locations) / len(locations)
+        avg_lon = sum(loc['lon'] for loc in locations) / len(locations)
+
+        # Zoom in base a numero posizioni
+        if len(locations) == 1:
+            zoom = 15
+        elif len(locations) <= 5:
+            zoom = 12
+        elif len(locations) <= 20:
+            zoom = 10
+        else:
+            zoom = 8
+
+        return avg_lat, avg_lon, zoom
+
+    def _generate_html(self):
+        """
+        Genera il file HTML principale
+
+        Returns:
+            str: Percorso file generato
+        """
+        from html_templates import create_breadcrumb
+
+        stats = self.results['stats']
+
+        center_lat, center_lon, zoom = self._calculate_map_center()
+
+        # Genera dati JavaScript per i marker
+        markers_js = self._generate_markers_js()
+
+        # Genera breadcrumb
+        breadcrumb_items = [
+            ('🏠 Dashboard', '../index.html'),
+            ('Posizioni Geografiche', None)
+        ]
+        breadcrumb_html = create_breadcrumb(breadcrumb_items)
+
+        html_content = _HTML_SHELL.format_map({
+            'unique_locations': stats['unique_locations'],
+            'total_events': stats['total_events'],
+            'total_chunks': stats['total_chunks'],
+            'locations_geocoded': stats['locations_geocoded'],
+            'locations_found': stats['locations_found'],
+            'breadcrumb_html': breadcrumb_html,
+            'table_rows': self._generate_table_rows(),
+            'errors_section': self._generate_errors_section(),
+            'generated_at': datetime.now().strftime('%d/%m/%Y alle %H:%M:%S'),
+            'center_lat': center_lat,
+            'center_lon': center_lon,
+            'zoom': zoom,
+            'markers_js': markers_js
+        })
+
         html_path = os.path.join(self.report_dir, "index.html")
         with open(html_path, 'w', encoding='utf-8') as f:
             f.write(html_content)
@@ -379,25 +459,8 @@ class LocationReportGenerator:
         Returns:
             str: JSON array dei marker
         """
-        markers = []
-        for loc in self.results['locations']:
-            markers.append({
-                'location_id': loc['location_id'],
-                'location_text': loc['location_text'],
-                'lat': loc['lat'],
-                'lon': loc['lon'],
-                'location_type': loc['location_type'],
-                'event_count': loc['event_count'],
-                'events': [{
-                    'chunk_id': evt['chunk_id'],
-                    'sender': evt['sender'],
-                    'timestamp': evt['timestamp'],
-                    'message_context': evt['message_context'][:200],  # Limita lunghezza
-                    'confidence': evt['confidence_score']
-                } for evt in loc['events']]
-            })
-
-        return json.dumps(markers, ensure_ascii=False)
+        # L'encoder riduce una posizione alla volta: nessuna copia completa della lista
+        return _json_dumps([_MarkerView(loc) for loc in self.results['locations']], default=_marker_default)
 
     def _generate_table_rows(self):
         """Genera righe tabella HTML"""
@@ -134,8 +134,9 @@ class PostAnalysisInfoDialog:
             prefs['show_post_analysis_info'] = show_post_analysis_info
 
             # Salva
+            payload = json.dumps(prefs, indent=4)
             with open(prefs_file, 'w', encoding='utf-8') as f:
-                json.dump(prefs, f, indent=4)
+                f.write(payload)
 
         except Exception as e:
             print(f"Errore salvataggio preferenze: {e}")
@@ -0,0 +1,69 @@
+"""
+Test del checkpoint su disco dell'estrazione posizioni
+"""
+
+from extraction_checkpoint import ExtractionCheckpoint
+
+SIGNATURE = {'chunks_dir': '/tmp/chunks', 'model': 'gpt-4o', 'context_deduction': False}
+LOCATIONS = [{'location_text': 'Via Roma 1, Milano', 'confidence_score': 90}]
+
+
+def _completed(path):
+    """Chunk completati letti da un checkpoint riaperto"""
+    checkpoint = ExtractionCheckpoint(path, SIGNATURE)
+    checkpoint.close()
+    return checkpoint.completed
+
+
+def test_resume(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = ExtractionCheckpoint(path, SIGNATURE)
+    checkpoint.add(1, LOCATIONS)
+    checkpoint.add(2, [])
+    checkpoint.close()
+
+    resumed = ExtractionCheckpoint(path, SIGNATURE)
+    assert resumed.completed == {1: LOCATIONS, 2: []}
+
+    # I chunk aggiunti dopo la ripresa si sommano a quelli già salvati
+    resumed.add(3, LOCATIONS)
+    resumed.close()
+    assert _completed(path) == {1: LOCATIONS, 2: [], 3: LOCATIONS}
+
+
+def test_signature_mismatch_starts_over(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = ExtractionCheckpoint(path, SIGNATURE)
+    checkpoint.add(1, LOCATIONS)
+    checkpoint.close()
+
+    other = ExtractionCheckpoint(path, {**SIGNATURE, 'model': 'claude-sonnet'})
+    assert other.completed == {}
+    other.close()
+
+    # Il file è stato riscritto con la nuova firma
+    assert _completed(path) == {}
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = ExtractionCheckpoint(path, SIGNATURE)
+    checkpoint.add(1, LOCATIONS)
+    checkpoint.close()
+
+    # Interruzione durante la scrittura del chunk 2
+    with open(path, 'ab') as f:
+        f.write(b'{"chunk_id": 2, "locat')
+
+    resumed = ExtractionCheckpoint(path, SIGNATURE)
+    assert resumed.completed == {1: LOCATIONS}
+    resumed.add(2, [])
+    resumed.close()
+    assert _completed(path) == {1: LOCATIONS, 2: []}
+
+
+def test_discard_removes_file(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = ExtractionCheckpoint(path, SIGNATURE)
+    checkpoint.discard()
+    assert not path.exists()
@@ -0,0 +1,58 @@
+"""
+Test della cache su disco dei risultati di geocoding
+"""
+
+import time
+
+import pytest
+
+import geocode_cache
+from geocode_cache import GeocodeCache, normalize_address
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GeocodeCache(tmp_path / "geocode.sqlite", ttl=100, negative_ttl=10)
+    yield cache
+    cache.close()
+
+
+def _advance(monkeypatch, seconds):
+    """Sposta avanti l'orologio visto dalla cache"""
+    now = time.time() + seconds
+    monkeypatch.setattr(geocode_cache.time, "time", lambda: now)
+
+
+def test_round_trip(cache, tmp_path):
+    cache.set("nominatim:via roma 1 milano", 45.46, 9.19, "Via Roma 1")
+    assert cache.get("nominatim:via roma 1 milano") == (45.46, 9.19, "Via Roma 1")
+    assert cache.get("nominatim:altro") is None
+
+    # Persistente tra aperture successive
+    cache.close()
+    reopened = GeocodeCache(tmp_path / "geocode.sqlite")
+    assert reopened.get("nominatim:via roma 1 milano") == (45.46, 9.19, "Via Roma 1")
+    reopened.close()
+
+
+def test_negative_entry(cache):
+    cache.set("google:luogo inesistente", None, None)
+    assert cache.get("google:luogo inesistente") == (None, None, None)
+
+
+def test_negative_entries_expire_first(cache, monkeypatch):
+    cache.set("found", 45.0, 9.0)
+    cache.set("not_found", None, None)
+
+    _advance(monkeypatch, 50)
+    assert cache.get("found") == (45.0, 9.0, None)
+    assert cache.get("not_found") is None
+
+    _advance(monkeypatch, 150)
+    assert cache.get("found") is None
+
+
+def test_normalize_address():
+    assert normalize_address("  Via ROMA, 1 —  Milano! ") == "via roma 1 milano"
+    # NFKC: forme compatibili e di larghezza piena coincidono
+    assert normalize_address("Ｍｉｌａｎｏ") == normalize_address("milano")
@@ -0,0 +1,88 @@
+"""
+Test della cache di validazione firmata di LicenseManager
+"""
+
+import base64
+import time
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+import license_manager
+from license_manager import LicenseManager, VALIDATION_CACHE_TTL
+
+KEY = "ABCD-1234-EFGH-5678"
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    """Coppia di chiavi del server; la pubblica è quella incorporata nel client"""
+    private_key = Ed25519PrivateKey.generate()
+    public_bytes = private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    monkeypatch.setattr(license_manager, "LICENSE_PUBLIC_KEY", base64.b64encode(public_bytes).decode())
+    return private_key
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return LicenseManager(license_file=tmp_path / ".license.enc")
+
+
+def _server_result(private_key, hardware_id, valid_until):
+    """Risposta di api.php a una validazione riuscita"""
+    signature = private_key.sign(f"{KEY}|{hardware_id}|{valid_until}".encode())
+    return {"valid": True, "valid_until": valid_until, "signature": base64.b64encode(signature).decode()}
+
+
+def test_signed_validation_is_trusted(signing_key, manager):
+    result = _server_result(signing_key, manager.hardware_id, int(time.time()) + 3600)
+    assert manager.remember_validation(KEY, result)
+    assert manager.is_cached_license_valid()
+
+
+def test_forged_expiry_is_rejected(signing_key, manager):
+    valid_until = int(time.time()) + 3600
+    result = _server_result(signing_key, manager.hardware_id, valid_until)
+    manager.remember_validation(KEY, result)
+
+    # Scadenza riscritta a mano, firma originale
+    manager.save_license(KEY, valid_until=valid_until + 60, server_sig=result["signature"])
+    assert not manager.is_cached_license_valid()
+
+
+def test_expiry_beyond_ttl_is_rejected(signing_key, manager):
+    valid_until = int(time.time()) + 10 * VALIDATION_CACHE_TTL
+    manager.remember_validation(KEY, _server_result(signing_key, manager.hardware_id, valid_until))
+    assert not manager.is_cached_license_valid()
+
+
+def test_unsigned_validation_is_not_cached(manager):
+    assert manager.remember_validation(KEY, {"valid": True})
+    assert manager.load_license()["license_key"] == KEY
+    assert not manager.is_cached_license_valid()
+
+
+def test_cache_disabled_without_public_key(signing_key, manager, monkeypatch):
+    result = _server_result(signing_key, manager.hardware_id, int(time.time()) + 3600)
+    manager.remember_validation(KEY, result)
+    monkeypatch.setattr(license_manager, "LICENSE_PUBLIC_KEY", "")
+    assert not manager.is_cached_license_valid()
+
+
+def test_legacy_migration_keeps_validated_at(signing_key, manager):
+    from cryptography.fernet import Fernet
+
+    validated_at = time.time() - 3600
+    valid_until = int(validated_at) + VALIDATION_CACHE_TTL
+    result = _server_result(signing_key, manager.hardware_id, valid_until)
+    data = {"license_key": KEY, "hardware_id": manager.hardware_id, "validated_at": validated_at,
+            "valid_until": valid_until, "server_sig": result["signature"]}
+    token = Fernet(manager._get_machine_key_legacy()).encrypt(license_manager._json_dumps(data))
+    manager.license_file.write_bytes(token)
+
+    assert manager.load_license() == data
+    # File riscritto nel formato attuale con gli stessi dati
+    assert manager.license_file.read_bytes()[:1] == license_manager._BLOB_VERSION
+    assert manager.load_license()["validated_at"] == validated_at
+    assert manager.is_cached_license_valid()
@@ -3116,8 +3116,17 @@ https://console.anthropic.com
             if license_data:
                 license_key = license_data.get('license_key')
 
-                # Valida online (timeout 5 secondi)
-                validation_result = self.license_manager.validate_license_online(license_key, timeout=5)
+                # Validazione online recente firmata dal server: evita il round-trip all'avvio
+                if self.license_manager.is_cached_license_valid(license_data):
+                    validation_result = {'valid': True}
+                else:
+                    # Valida online (timeout 2s connessione, 3s risposta), con il ping di
+                    # telemetria nella stessa richiesta
+                    validation_result = self.license_manager.validate_license_online(
+                        license_key, timeout=(2, 3), app_version="3.2.2"
+                    )
+                    if validation_result.get('valid'):
+                        self.license_manager.remember_validation(license_key, validation_result)
 
                 if not validation_result.get('valid'):
                     # Licenza non più valida (revocata o scaduta)
@@ -3131,8 +3140,10 @@ https://console.anthropic.com
                     self.root.destroy()
                     return
 
-                # Licenza valida, invia telemetria
-                self.license_manager.send_telemetry(license_key, app_version="3.2.2")
+                # Licenza valida, invia telemetria se non già registrata con la validazione
+                # (in background, non ritarda l'avvio)
+                if not validation_result.get('ping'):
+                    self.license_manager.send_telemetry_async(license_key, app_version="3.2.2")
             else:
                 # Errore caricamento licenza, richiedi nuovamente
                 self._show_license_dialog()